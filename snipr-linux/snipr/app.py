@@ -1,3 +1,7 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
 import gi
 
 gi.require_version("Gtk", "4.0")
@@ -7,9 +11,13 @@ gi.require_version("GdkPixbuf", "2.0")
 from gi.repository import Adw, Gio, GLib
 
 from snipr.services.display_server import get_display_server
-from snipr.services.screen_capture import create_screen_capture_service
-from snipr.services.clipboard import ClipboardService
-from snipr.services.video_recording import VideoRecordingService
+
+if TYPE_CHECKING:
+    from snipr.services.clipboard import ClipboardService
+    from snipr.services.screen_capture_portal import PortalScreenCapture
+    from snipr.services.screen_capture_x11 import X11ScreenCapture
+    from snipr.services.video_recording import VideoRecordingService
+    from snipr.services.window_enum import WindowEnumerationService
 
 
 class SniprApplication(Adw.Application):
@@ -19,23 +27,65 @@ class SniprApplication(Adw.Application):
             flags=Gio.ApplicationFlags.DEFAULT_FLAGS,
         )
         self.display_server = get_display_server()
-        self.capture_service = None
-        self.clipboard_service = None
-        self.video_service = None
+        self._capture_service = None
+        self._clipboard_service = None
+        self._video_service = None
+        self._window_enum_service = None
         self._main_window = None
 
+    # Services are created on first use so startup doesn't pay for the
+    # capture backend (Xlib / D-Bus / PIL) or FFmpeg plumbing up front.
+
+    @property
+    def capture_service(self) -> X11ScreenCapture | PortalScreenCapture:
+        if self._capture_service is None:
+            from snipr.services.screen_capture import create_screen_capture_service
+            self._capture_service = create_screen_capture_service()
+        return self._capture_service
+
+    @property
+    def clipboard_service(self) -> ClipboardService:
+        if self._clipboard_service is None:
+            from snipr.services.clipboard import ClipboardService
+            self._clipboard_service = ClipboardService()
+        return self._clipboard_service
+
+    @property
+    def video_service(self) -> VideoRecordingService:
+        if self._video_service is None:
+            from snipr.services.video_recording import VideoRecordingService
+            self._video_service = VideoRecordingService(self.display_server)
+        return self._video_service
+
+    @property
+    def window_enum_service(self) -> WindowEnumerationService:
+        # Shared so its X connection and interned atoms outlive each overlay
+        if self._window_enum_service is None:
+            from snipr.services.window_enum import WindowEnumerationService
+            self._window_enum_service = WindowEnumerationService()
+        return self._window_enum_service
+
+    @property
+    def has_video_service(self) -> bool:
+        return self._video_service is not None
+
     def do_startup(self):
         Adw.Application.do_startup(self)
         self._setup_actions()
         self._setup_theme()
-        self._load_css()
+        # CSS is cosmetic; load it once the main loop is idle
+        GLib.idle_add(self._load_css)
+        # Find a hardware encoder in the background so it's known by the
+        # time the first recording starts
+        GLib.idle_add(self._start_encoder_probe, priority=GLib.PRIORITY_LOW)
+
+    def do_shutdown(self):
+        if self._window_enum_service is not None:
+            self._window_enum_service.cleanup()
+        Adw.Application.do_shutdown(self)
 
     def do_activate(self):
         if self._main_window is None:
-            self.capture_service = create_screen_capture_service()
-            self.clipboard_service = ClipboardService()
-            self.video_service = VideoRecordingService(self.display_server)
-
             from snipr.ui.main_window import MainWindow
             self._main_window = MainWindow(application=self)
 
@@ -73,6 +123,12 @@ class SniprApplication(Adw.Application):
             )
         except Exception:
             pass  # CSS is optional polish
+        return False  # Don't repeat GLib.idle_add
+
+    def _start_encoder_probe(self):
+        from snipr.services.video_recording import start_encoder_probe
+        start_encoder_probe()
+        return False  # Don't repeat GLib.idle_add
 
     def _on_new_capture(self, action, param):
         if self._main_window:
@@ -16,28 +16,35 @@ class CaptureMode(Enum):
 
     @property
     def is_video(self) -> bool:
-        return self in (
-            CaptureMode.RECTANGLE_VIDEO,
-            CaptureMode.WINDOW_VIDEO,
-            CaptureMode.FULLSCREEN_VIDEO,
-        )
+        return self in _VIDEO_MODES
 
     @property
     def is_screenshot(self) -> bool:
-        return not self.is_video
+        return self not in _VIDEO_MODES
 
     @property
     def requires_window_selection(self) -> bool:
-        return self in (CaptureMode.WINDOW_SNIP, CaptureMode.WINDOW_VIDEO)
+        return self in _WINDOW_MODES
 
     @property
     def requires_rectangle_selection(self) -> bool:
-        return self in (CaptureMode.RECTANGLE_SNIP, CaptureMode.RECTANGLE_VIDEO)
+        return self in _RECTANGLE_MODES
 
     @property
     def requires_freeform_selection(self) -> bool:
-        return self == CaptureMode.FREEFORM_SNIP
+        return self is CaptureMode.FREEFORM_SNIP
 
     @property
     def is_fullscreen(self) -> bool:
-        return self in (CaptureMode.FULLSCREEN_SNIP, CaptureMode.FULLSCREEN_VIDEO)
+        return self in _FULLSCREEN_MODES
+
+
+# Membership tables for the predicates above (built once, O(1) lookup)
+_VIDEO_MODES = frozenset({
+    CaptureMode.RECTANGLE_VIDEO,
+    CaptureMode.WINDOW_VIDEO,
+    CaptureMode.FULLSCREEN_VIDEO,
+})
+_WINDOW_MODES = frozenset({CaptureMode.WINDOW_SNIP, CaptureMode.WINDOW_VIDEO})
+_RECTANGLE_MODES = frozenset({CaptureMode.RECTANGLE_SNIP, CaptureMode.RECTANGLE_VIDEO})
+_FULLSCREEN_MODES = frozenset({CaptureMode.FULLSCREEN_SNIP, CaptureMode.FULLSCREEN_VIDEO})
@@ -15,6 +15,7 @@ class CaptureResult:
     mode: CaptureMode
     screenshot: GdkPixbuf.Pixbuf | None = None
     video_path: str | None = None
+    video_size_bytes: int = 0
     captured_at: datetime = field(default_factory=datetime.now)
     capture_region: tuple[int, int, int, int] = (0, 0, 0, 0)  # x, y, w, h
 
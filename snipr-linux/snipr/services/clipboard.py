@@ -2,22 +2,66 @@
 
 from __future__ import annotations
 
+import fcntl
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
 import gi
 
 gi.require_version("Gtk", "4.0")
 gi.require_version("Gdk", "4.0")
 gi.require_version("GdkPixbuf", "2.0")
 
-from gi.repository import Gdk, GdkPixbuf, Gio, Gtk
+from gi.repository import Gdk, GdkPixbuf, Gio, GLib, Gtk
+
+from snipr.services.pixbuf_utils import pixbuf_to_texture
+
+# ioctl that shares a file's extents with another (reflink), from linux/fs.h
+_FICLONE = 0x40049409
+
+
+def _copy_file(src: str, dst: str) -> None:
+    """Copy ``src`` to ``dst``, moving as few bytes as the filesystem allows.
+
+    Tries a hard link (same filesystem), then a reflink clone (btrfs, XFS),
+    and only then a full byte copy.
+    """
+    tmp = f"{dst}.part"
+    try:
+        # Link under a temporary name so an existing dst is replaced atomically
+        os.link(src, tmp)
+        os.replace(tmp, dst)
+        return
+    except OSError:
+        pass
+    try:
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+        shutil.copystat(src, dst)
+        return
+    except OSError:
+        pass
+    shutil.copy2(src, dst)
 
 
 class ClipboardService:
+    def __init__(self):
+        # Image encoding happens in C (libpng/libjpeg), so saves can run
+        # off the GTK thread without holding up the UI.
+        self._io_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="snipr-io")
+
     def copy_image(self, pixbuf: GdkPixbuf.Pixbuf, window: Gtk.Window) -> None:
-        """Copy a pixbuf image to the system clipboard."""
+        """Copy a pixbuf image to the system clipboard.
+
+        The texture provider serves PNG and TIFF, and through GTK's gdk-pixbuf
+        serializers also image/jpeg and the other writable formats. Each is
+        encoded only when a paste actually requests it, off the main thread,
+        so nothing is encoded up front.
+        """
         clipboard = window.get_display().get_clipboard()
-        texture = Gdk.Texture.new_for_pixbuf(pixbuf)
-        content = Gdk.ContentProvider.new_for_value(texture)
-        clipboard.set_content(content)
+        clipboard.set_content(Gdk.ContentProvider.new_for_value(pixbuf_to_texture(pixbuf)))
 
     def copy_file_path(self, path: str, window: Gtk.Window) -> None:
         """Copy a file path to the system clipboard."""
@@ -25,14 +69,59 @@ class ClipboardService:
         content = Gdk.ContentProvider.new_for_value(path)
         clipboard.set_content(content)
 
+    def save_pixbuf_async(self, pixbuf: GdkPixbuf.Pixbuf, path: str,
+                          callback: Callable[[bool], None], fast: bool = True) -> None:
+        """Save a pixbuf on a worker thread; ``callback(success)`` runs on the main loop."""
+        future = self._io_pool.submit(self.save_pixbuf, pixbuf, path, fast)
+
+        def on_done(fut):
+            success = fut.result()
+            GLib.idle_add(lambda: (callback(success), False)[1])
+
+        future.add_done_callback(on_done)
+
     @staticmethod
-    def save_pixbuf(pixbuf: GdkPixbuf.Pixbuf, path: str) -> bool:
-        """Save a pixbuf to a file. Format is inferred from extension."""
+    def save_pixbuf(pixbuf: GdkPixbuf.Pixbuf, path: str, fast: bool = True) -> bool:
+        """Save a pixbuf to a file. Format is inferred from extension.
+
+        With ``fast`` (interactive saves) PNGs use zlib level 1, which is several
+        times quicker than libpng's default for a slightly larger file; pass
+        ``fast=False`` to favour size.
+        """
         ext = path.rsplit(".", 1)[-1].lower() if "." in path else "png"
         fmt_map = {"jpg": "jpeg", "jpeg": "jpeg", "png": "png", "bmp": "bmp", "gif": "gif"}
         fmt = fmt_map.get(ext, "png")
+        if fmt == "png":
+            keys, values = ["compression"], ["1" if fast else "9"]
+        elif fmt == "jpeg":
+            keys, values = ["quality"], ["90"]
+        else:
+            keys, values = [], []
         try:
-            pixbuf.savev(path, fmt, [], [])
+            # Encode through a 1 MiB buffered stream so multi-megabyte images
+            # are written in a few large chunks rather than many small writes.
+            file = Gio.File.new_for_path(path)
+            base = file.replace(None, False, Gio.FileCreateFlags.NONE, None)
+            stream = Gio.BufferedOutputStream.new_sized(base, 1 << 20)
+            try:
+                pixbuf.save_to_streamv(stream, fmt, keys, values, None)
+            finally:
+                stream.close(None)
             return True
         except Exception:
             return False
+
+    def save_file_async(self, src: str, dst: str,
+                        callback: Callable[[str | None], None]) -> None:
+        """Copy ``src`` to ``dst`` on a worker thread.
+
+        ``callback(error)`` runs on the main loop with None on success.
+        """
+        future = self._io_pool.submit(_copy_file, src, dst)
+
+        def on_done(fut):
+            exc = fut.exception()
+            error = str(exc) if exc else None
+            GLib.idle_add(lambda: (callback(error), False)[1])
+
+        future.add_done_callback(on_done)
@@ -0,0 +1,93 @@
+"""Pixel-buffer helpers shared by the screen capture backends."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import gi
+
+gi.require_version("Gdk", "4.0")
+gi.require_version("GdkPixbuf", "2.0")
+
+from gi.repository import Gdk, GdkPixbuf, GLib
+
+# PIL is imported where it's used: the main window imports this module for
+# pixbuf_to_texture, and loading PIL would put it back on the startup path.
+if TYPE_CHECKING:
+    from PIL import Image
+
+
+def pil_to_pixbuf(image: Image.Image) -> GdkPixbuf.Pixbuf:
+    """Wrap a PIL Image's raw pixels in a GdkPixbuf.Pixbuf (no PNG round-trip)."""
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    has_alpha = image.mode == "RGBA"
+    width, height = image.size
+    return GdkPixbuf.Pixbuf.new_from_bytes(
+        GLib.Bytes.new_take(image.tobytes()),
+        GdkPixbuf.Colorspace.RGB, has_alpha, 8,
+        width, height, width * (4 if has_alpha else 3),
+    )
+
+
+def pixbuf_to_texture(pixbuf: GdkPixbuf.Pixbuf) -> Gdk.MemoryTexture:
+    """Wrap a pixbuf's pixel storage in a Gdk.MemoryTexture.
+
+    ``read_pixel_bytes()`` shares the pixbuf's buffer rather than copying it
+    (pixbufs built with ``new_from_bytes`` already own a GBytes), so the
+    texture references the captured pixels directly.
+    """
+    fmt = Gdk.MemoryFormat.R8G8B8A8 if pixbuf.get_has_alpha() else Gdk.MemoryFormat.R8G8B8
+    return Gdk.MemoryTexture.new(
+        pixbuf.get_width(), pixbuf.get_height(), fmt,
+        pixbuf.read_pixel_bytes(), pixbuf.get_rowstride(),
+    )
+
+
+def bgrx_to_pixbuf(data: bytes, width: int, height: int) -> GdkPixbuf.Pixbuf:
+    """Build an RGB pixbuf from a 32bpp BGRX buffer (X11 ZPixmap layout).
+
+    The channel swizzle is done with strided slice copies, which run in C,
+    so no intermediate PIL image is created. The finished frame is copied
+    once more into the GLib.Bytes: PyGObject reads byte arrays directly only
+    from ``bytes``, and walks a bytearray item by item.
+    """
+    rgb = bytearray(width * height * 3)
+    rgb[0::3] = data[2::4]
+    rgb[1::3] = data[1::4]
+    rgb[2::3] = data[0::4]
+    return GdkPixbuf.Pixbuf.new_from_bytes(
+        GLib.Bytes.new_take(bytes(rgb)),
+        GdkPixbuf.Colorspace.RGB, False, 8,
+        width, height, width * 3,
+    )
+
+
+def polygon_mask(width: int, height: int, points: list[tuple[int, int]],
+                 x: int = 0, y: int = 0) -> Image.Image:
+    """Rasterize a screen-space polygon into an ``L`` mask for the region at (x, y)."""
+    from PIL import Image, ImageDraw
+
+    mask = Image.new("L", (width, height), 0)
+    if len(points) >= 3:
+        local_points = [(px - x, py - y) for px, py in points]
+        ImageDraw.Draw(mask).polygon(local_points, fill=255)
+    return mask
+
+
+def polygon_bounds(x: int, y: int, width: int, height: int,
+                   points: list[tuple[int, int]]) -> tuple[int, int, int, int]:
+    """Shrink the region (x, y, width, height) to the polygon's bounding box.
+
+    Pixels outside the polygon end up fully transparent, so there is no
+    point capturing, masking or encoding them.
+    """
+    if len(points) < 3:
+        return x, y, width, height
+    x0 = max(x, min(px for px, _ in points))
+    y0 = max(y, min(py for _, py in points))
+    x1 = min(x + width, max(px for px, _ in points) + 1)
+    y1 = min(y + height, max(py for _, py in points) + 1)
+    if x1 <= x0 or y1 <= y0:
+        return x, y, width, height
+    return x0, y0, x1 - x0, y1 - y0
@@ -2,9 +2,11 @@
 
 from __future__ import annotations
 
-import io
 import os
-import random
+import secrets
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
 from urllib.parse import urlparse, unquote
 
 import gi
@@ -14,6 +16,14 @@ gi.require_version("GdkPixbuf", "2.0")
 from gi.repository import Gio, GLib, GdkPixbuf
 from PIL import Image
 
+from snipr.services.pixbuf_utils import pil_to_pixbuf, polygon_bounds, polygon_mask
+
+# Directories whose portal screenshots are throwaway temp files. Some portal
+# implementations save into the user's Pictures folder instead; those are kept.
+_TEMP_DIRS = tuple(
+    os.path.join(d, "") for d in (tempfile.gettempdir(), os.environ.get("XDG_RUNTIME_DIR")) if d
+)
+
 # Portal D-Bus constants
 PORTAL_BUS = "org.freedesktop.portal.Desktop"
 PORTAL_PATH = "/org/freedesktop/portal/desktop"
@@ -21,6 +31,11 @@ SCREENSHOT_IFACE = "org.freedesktop.portal.Screenshot"
 SCREENCAST_IFACE = "org.freedesktop.portal.ScreenCast"
 REQUEST_IFACE = "org.freedesktop.portal.Request"
 
+# Immutable GVariant values reused by every request
+_REQUEST_REPLY_TYPE = GLib.VariantType.new("(o)")
+_INTERACTIVE = {True: GLib.Variant("b", True), False: GLib.Variant("b", False)}
+_SOURCE_TYPE_MONITOR = GLib.Variant("u", 1)
+
 
 class PortalScreenCapture:
     """Screen capture backend using XDG Desktop Portal for Wayland."""
@@ -28,16 +43,22 @@ class PortalScreenCapture:
     def __init__(self):
         self._bus = Gio.bus_get_sync(Gio.BusType.SESSION, None)
         self._sender = self._bus.get_unique_name().replace(".", "_").lstrip(":")
+        self._request_prefix = f"{PORTAL_PATH}/request/{self._sender}/"
+        self._cached_size: tuple[int, int] | None = None
+        # Background work that can overlap the portal round trip
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snipr-portal")
 
     def capture_fullscreen(self) -> GdkPixbuf.Pixbuf:
         """Capture fullscreen via portal (non-interactive)."""
         uri = self._screenshot(interactive=False)
-        return self._load_uri(uri)
+        pixbuf = self._load_uri(uri)
+        self._cached_size = (pixbuf.get_width(), pixbuf.get_height())
+        return pixbuf
 
     def capture_region(self, x: int, y: int, width: int, height: int) -> GdkPixbuf.Pixbuf:
         """Capture fullscreen then crop to region."""
         uri = self._screenshot(interactive=False)
-        pixbuf = self._load_uri(uri)
+        pixbuf = self._load_uri_rows(uri, y + height)
         return pixbuf.new_subpixbuf(x, y, width, height)
 
     def capture_window(self, **kwargs) -> GdkPixbuf.Pixbuf:
@@ -48,181 +69,314 @@ class PortalScreenCapture:
     def capture_freeform(self, x: int, y: int, width: int, height: int,
                          points: list[tuple[int, int]]) -> GdkPixbuf.Pixbuf:
         """Capture fullscreen, then apply polygon mask."""
-        uri = self._screenshot(interactive=False)
-        pixbuf = self._load_uri(uri)
-
-        # Convert to PIL for freeform masking
-        buf = io.BytesIO()
-        success, data = pixbuf.save_to_bufferv("png", [], [])
-        buf.write(data)
-        buf.seek(0)
-        image = Image.open(buf).convert("RGBA")
+        x, y, width, height = polygon_bounds(x, y, width, height, points)
+        # The mask doesn't depend on the screenshot, so rasterize it while
+        # the portal request and decode are in flight.
+        mask_future = self._pool.submit(polygon_mask, width, height, points, x, y)
 
-        # Crop to bounding box
-        cropped = image.crop((x, y, x + width, y + height))
+        uri = self._screenshot(interactive=False)
+        return self._masked_crop(uri, (x, y, width, height), mask_future.result())
+
+    def capture_freeform_async(
+        self, x: int, y: int, width: int, height: int, points: list[tuple[int, int]],
+        callback: Callable[[GdkPixbuf.Pixbuf | None, str | None], None],
+    ) -> None:
+        """Like capture_freeform, but ``callback(pixbuf, error)`` runs on the main loop."""
+        x, y, width, height = polygon_bounds(x, y, width, height, points)
+        mask_future = self._pool.submit(polygon_mask, width, height, points, x, y)
+
+        def on_uri(uri, error):
+            if error:
+                callback(None, error)
+                return
+            try:
+                pixbuf = self._masked_crop(uri, (x, y, width, height), mask_future.result())
+            except OSError as e:
+                callback(None, str(e))
+                return
+            callback(pixbuf, None)
+
+        self._screenshot_async(interactive=False, callback=on_uri)
+
+    def _masked_crop(self, uri: str, region: tuple[int, int, int, int],
+                     mask: Image.Image) -> GdkPixbuf.Pixbuf:
+        """Crop the portal screenshot at ``uri`` to ``region`` and apply ``mask``."""
+        x, y, width, height = region
+        # Decode the portal file straight into PIL and crop before converting
+        path = self._uri_to_path(uri)
+        with Image.open(path) as image:
+            cropped = image.crop((x, y, x + width, y + height)).convert("RGBA")
+        self._discard_file(path)
 
         # Apply polygon mask
-        from PIL import ImageDraw
-        mask = Image.new("L", (width, height), 0)
-        draw = ImageDraw.Draw(mask)
-        local_points = [(px - x, py - y) for px, py in points]
-        if len(local_points) >= 3:
-            draw.polygon(local_points, fill=255)
         cropped.putalpha(mask)
 
-        # Convert back to pixbuf
-        out = io.BytesIO()
-        cropped.save(out, format="PNG")
-        out.seek(0)
-        loader = GdkPixbuf.PixbufLoader.new_with_type("png")
-        loader.write(out.read())
-        loader.close()
-        return loader.get_pixbuf()
+        return pil_to_pixbuf(cropped)
 
     def capture_desktop_image(self) -> Image.Image:
         """Capture desktop as PIL Image (for overlay backgrounds on Wayland)."""
         uri = self._screenshot(interactive=False)
         path = self._uri_to_path(uri)
-        return Image.open(path).convert("RGB")
+        with Image.open(path) as image:
+            image = image.convert("RGB")
+        self._discard_file(path)
+        return image
 
     def get_screen_size(self) -> tuple[int, int]:
-        """Get screen size - use a portal screenshot and check dimensions."""
+        """Get screen size - use a portal screenshot and check dimensions.
+
+        The result is remembered, and any fullscreen capture refreshes it, so
+        the portal is only asked for an extra screenshot the first time.
+        """
+        if self._cached_size is not None:
+            return self._cached_size
         try:
-            uri = self._screenshot(interactive=False)
-            pixbuf = self._load_uri(uri)
-            return pixbuf.get_width(), pixbuf.get_height()
+            self.capture_fullscreen()
+            return self._cached_size
         except Exception:
             return 1920, 1080
 
+    def capture_fullscreen_async(
+        self, callback: Callable[[GdkPixbuf.Pixbuf | None, str | None], None],
+    ) -> None:
+        """Capture fullscreen without blocking the main loop.
+
+        ``callback(pixbuf, error)`` is invoked on the main loop once the
+        portal has answered; exactly one of the two arguments is None.
+        """
+        def on_uri(uri, error):
+            if error:
+                callback(None, error)
+                return
+            try:
+                pixbuf = self._load_uri(uri)
+            except GLib.Error as e:
+                callback(None, e.message)
+                return
+            self._cached_size = (pixbuf.get_width(), pixbuf.get_height())
+            callback(pixbuf, None)
+
+        self._screenshot_async(interactive=False, callback=on_uri)
+
     def _screenshot(self, interactive: bool) -> str:
         """Call the Screenshot portal and return the file URI."""
-        token = f"snipr_{random.randint(1, 999999)}"
-        request_path = f"/org/freedesktop/portal/desktop/request/{self._sender}/{token}"
+        outcome = []
+        self._screenshot_async(interactive, lambda uri, error: outcome.append((uri, error)))
+        self._iterate_until(outcome)
+
+        uri, error = outcome[0]
+        if error:
+            raise RuntimeError(error)
+        return uri
+
+    def _screenshot_async(self, interactive: bool,
+                          callback: Callable[[str | None, str | None], None]) -> None:
+        """Call the Screenshot portal; ``callback(uri, error)`` receives the result."""
+        def on_response(results, error):
+            if error:
+                callback(None, error)
+            elif "uri" not in results:
+                callback(None, "No URI returned from screenshot portal")
+            else:
+                callback(results["uri"], None)
 
-        loop = GLib.MainLoop()
-        result_uri = [None]
-        error = [None]
+        options = {"interactive": _INTERACTIVE[interactive]}
+        self._portal_request(
+            SCREENSHOT_IFACE, "Screenshot",
+            lambda opts: GLib.Variant("(sa{sv})", ("", opts)),
+            options, on_response,
+        )
 
-        def on_response(connection, sender, path, iface, signal, params):
+    def _portal_request(self, iface: str, method: str,
+                        build_params: Callable[[GLib.Variant], GLib.Variant],
+                        options: dict, callback: Callable[[dict | None, str | None], None]) -> None:
+        """Invoke a portal method that answers through a Request::Response signal.
+
+        The Response subscription is installed before the method call so the
+        reply can't be missed. ``callback(results, error)`` runs on the main
+        loop when the portal responds, the call fails, or 30 s elapse.
+        """
+        token = self._new_token()
+        request_path = self._request_prefix + token
+        sub_id = None
+        timeout_id = None
+        done = False
+
+        def finish(results, error):
+            nonlocal done
+            if done:
+                return
+            done = True
+            self._bus.signal_unsubscribe(sub_id)
+            if timeout_id is not None:
+                GLib.source_remove(timeout_id)
+            callback(results, error)
+
+        def on_response(connection, sender, path, iface_name, signal, params):
             response, results = params.unpack()
-            if response == 0 and "uri" in results:
-                result_uri[0] = results["uri"]
+            if response == 0:
+                finish(results, None)
             else:
-                error[0] = f"Portal screenshot failed with response {response}"
-            loop.quit()
+                finish(None, f"Portal {method} failed with response {response}")
+
+        def on_reply(connection, result):
+            try:
+                connection.call_finish(result)
+            except GLib.Error as e:
+                finish(None, f"Portal {method} call failed: {e.message}")
+
+        def on_timeout():
+            nonlocal timeout_id
+            timeout_id = None
+            finish(None, f"Portal {method} timed out")
+            return False
 
         sub_id = self._bus.signal_subscribe(
             PORTAL_BUS, REQUEST_IFACE, "Response",
             request_path, None, Gio.DBusSignalFlags.NONE, on_response,
         )
-
-        options = GLib.Variant("a{sv}", {
-            "handle_token": GLib.Variant("s", token),
-            "interactive": GLib.Variant("b", interactive),
-        })
-
-        self._bus.call_sync(
-            PORTAL_BUS, PORTAL_PATH, SCREENSHOT_IFACE, "Screenshot",
-            GLib.Variant("(sa{sv})", ("", options)),
-            GLib.VariantType.new("(o)"),
-            Gio.DBusCallFlags.NONE, 30000, None,
+        timeout_id = GLib.timeout_add(30000, on_timeout)
+
+        options = dict(options, handle_token=GLib.Variant("s", token))
+        self._bus.call(
+            PORTAL_BUS, PORTAL_PATH, iface, method,
+            build_params(GLib.Variant("a{sv}", options)),
+            _REQUEST_REPLY_TYPE,
+            Gio.DBusCallFlags.NONE, 30000, None, on_reply,
         )
 
-        # Run loop with a timeout
-        GLib.timeout_add(30000, lambda: (loop.quit(), False)[1])
-        loop.run()
-
-        self._bus.signal_unsubscribe(sub_id)
+    @staticmethod
+    def _new_token(prefix: str = "snipr_") -> str:
+        """Return a collision-resistant portal handle token."""
+        return prefix + secrets.token_hex(6)
 
-        if error[0]:
-            raise RuntimeError(error[0])
-        if result_uri[0] is None:
-            raise RuntimeError("No URI returned from screenshot portal")
+    @staticmethod
+    def _iterate_until(outcome: list) -> None:
+        """Dispatch main-context events until an async request fills ``outcome``.
 
-        return result_uri[0]
+        Used by the synchronous capture API; the UI keeps processing events
+        meanwhile, and every request is bounded by its own timeout.
+        """
+        context = GLib.MainContext.default()
+        while not outcome:
+            context.iteration(True)
 
     def start_screencast(self) -> str:
         """Start a screencast session and return the PipeWire node ID."""
-        token = f"snipr_{random.randint(1, 999999)}"
-        session_token = f"snipr_session_{random.randint(1, 999999)}"
-
-        # Create session
-        session_options = GLib.Variant("a{sv}", {
-            "handle_token": GLib.Variant("s", token),
-            "session_handle_token": GLib.Variant("s", session_token),
-        })
-
-        result = self._bus.call_sync(
-            PORTAL_BUS, PORTAL_PATH, SCREENCAST_IFACE, "CreateSession",
-            GLib.Variant("(a{sv})", (session_options,)),
-            GLib.VariantType.new("(o)"),
-            Gio.DBusCallFlags.NONE, 30000, None,
+        outcome = []
+        self.start_screencast_async(lambda node_id, error: outcome.append((node_id, error)))
+        self._iterate_until(outcome)
+
+        node_id, error = outcome[0]
+        if error:
+            raise RuntimeError(error)
+        return node_id
+
+    def start_screencast_async(self, callback: Callable[[str | None, str | None], None]) -> None:
+        """Start a screencast session without blocking the main loop.
+
+        CreateSession, SelectSources and Start are chained from each other's
+        responses; ``callback(node_id, error)`` receives the PipeWire node.
+        """
+        def on_started(results, error):
+            streams = results.get("streams") if results else None
+            if error or not streams:
+                callback(None, error or "Failed to get PipeWire node from screencast portal")
+                return
+            callback(str(streams[0][0]), None)
+
+        def on_sources_selected(session_handle, error):
+            if error:
+                callback(None, error)
+                return
+            self._portal_request(
+                SCREENCAST_IFACE, "Start",
+                lambda opts: GLib.Variant("(osa{sv})", (session_handle, "", opts)),
+                {}, on_started,
+            )
+
+        def on_session_created(results, error):
+            if error:
+                callback(None, error)
+                return
+            session_handle = results["session_handle"]
+            self._portal_request(
+                SCREENCAST_IFACE, "SelectSources",
+                lambda opts: GLib.Variant("(oa{sv})", (session_handle, opts)),
+                {"types": _SOURCE_TYPE_MONITOR},
+                lambda _results, err: on_sources_selected(session_handle, err),
+            )
+
+        self._portal_request(
+            SCREENCAST_IFACE, "CreateSession",
+            lambda opts: GLib.Variant("(a{sv})", (opts,)),
+            {"session_handle_token": GLib.Variant("s", self._new_token("snipr_session_"))},
+            on_session_created,
         )
 
-        session_handle = result.unpack()[0]
-
-        # Select sources (monitor)
-        select_options = GLib.Variant("a{sv}", {
-            "handle_token": GLib.Variant("s", f"snipr_{random.randint(1, 999999)}"),
-            "types": GLib.Variant("u", 1),  # 1 = monitor
-        })
-
-        self._bus.call_sync(
-            PORTAL_BUS, PORTAL_PATH, SCREENCAST_IFACE, "SelectSources",
-            GLib.Variant("(oa{sv})", (session_handle, select_options)),
-            GLib.VariantType.new("(o)"),
-            Gio.DBusCallFlags.NONE, 30000, None,
-        )
-
-        # Start
-        loop = GLib.MainLoop()
-        node_id = [None]
-
-        start_token = f"snipr_{random.randint(1, 999999)}"
-        start_request_path = f"/org/freedesktop/portal/desktop/request/{self._sender}/{start_token}"
-
-        def on_start_response(connection, sender, path, iface, signal, params):
-            response, results = params.unpack()
-            if response == 0 and "streams" in results:
-                streams = results["streams"]
-                if streams:
-                    node_id[0] = str(streams[0][0])
-            loop.quit()
-
-        sub_id = self._bus.signal_subscribe(
-            PORTAL_BUS, REQUEST_IFACE, "Response",
-            start_request_path, None, Gio.DBusSignalFlags.NONE, on_start_response,
-        )
-
-        start_options = GLib.Variant("a{sv}", {
-            "handle_token": GLib.Variant("s", start_token),
-        })
-
-        self._bus.call_sync(
-            PORTAL_BUS, PORTAL_PATH, SCREENCAST_IFACE, "Start",
-            GLib.Variant("(osa{sv})", (session_handle, "", start_options)),
-            GLib.VariantType.new("(o)"),
-            Gio.DBusCallFlags.NONE, 30000, None,
-        )
-
-        GLib.timeout_add(30000, lambda: (loop.quit(), False)[1])
-        loop.run()
-
-        self._bus.signal_unsubscribe(sub_id)
-
-        if node_id[0] is None:
-            raise RuntimeError("Failed to get PipeWire node from screencast portal")
-
-        return node_id[0]
-
     @staticmethod
     def _uri_to_path(uri: str) -> str:
         parsed = urlparse(uri)
         return unquote(parsed.path)
 
     def _load_uri(self, uri: str) -> GdkPixbuf.Pixbuf:
+        # Decode from a GIO stream: large sequential reads straight into the
+        # loader rather than libpng pulling small stdio blocks.
+        stream = Gio.File.new_for_uri(uri).read(None)
+        try:
+            pixbuf = GdkPixbuf.Pixbuf.new_from_stream(stream, None)
+        finally:
+            stream.close(None)
+        self._discard_file(self._uri_to_path(uri))
+        return pixbuf
+
+    def _discard_file(self, path: str) -> None:
+        """Unlink a decoded portal temp file on the worker thread."""
+        if path.startswith(_TEMP_DIRS):
+            self._pool.submit(_unlink_quietly, path)
+
+    def _load_uri_rows(self, uri: str, rows: int) -> GdkPixbuf.Pixbuf:
+        """Decode the portal image only as far down as ``rows``.
+
+        PNG scanlines decode top to bottom, so the file is fed to a
+        progressive loader and feeding stops once the needed rows exist.
+        Rows below that are left uninitialised; callers must crop.
+        """
         path = self._uri_to_path(uri)
-        return GdkPixbuf.Pixbuf.new_from_file(path)
+        decoded = 0
+
+        def on_area_updated(_loader, _x, area_y, _w, area_h):
+            nonlocal decoded
+            decoded = max(decoded, area_y + area_h)
+
+        loader = GdkPixbuf.PixbufLoader()
+        loader.connect("area-updated", on_area_updated)
+        with open(path, "rb") as f:
+            chunk = f.read(1 << 18)
+            # Interlaced PNGs report full-height passes early; decode all of them
+            if chunk[:8] == b"\x89PNG\r\n\x1a\n" and len(chunk) > 28 and chunk[28] != 0:
+                rows = float("inf")
+            while chunk:
+                loader.write(chunk)
+                if decoded >= rows:
+                    break
+                chunk = f.read(1 << 18)
+        try:
+            loader.close()
+        except GLib.Error:
+            pass  # Expected when feeding stopped before the end of the file
+        pixbuf = loader.get_pixbuf()
+        if pixbuf is None:
+            raise RuntimeError(f"Could not decode portal screenshot {path}")
+        self._discard_file(path)
+        return pixbuf
 
     def close(self) -> None:
+        self._pool.shutdown(wait=False)
+
+
+def _unlink_quietly(path: str) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
         pass
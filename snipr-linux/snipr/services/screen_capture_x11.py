@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-import io
+from typing import Callable
 
 import gi
 
@@ -11,6 +11,10 @@ gi.require_version("GdkPixbuf", "2.0")
 from gi.repository import GdkPixbuf
 from PIL import Image
 
+from snipr.services.pixbuf_utils import (
+    bgrx_to_pixbuf, pil_to_pixbuf, polygon_bounds, polygon_mask,
+)
+
 
 class X11ScreenCapture:
     """Screen capture backend for X11 using python-xlib."""
@@ -19,18 +23,56 @@ class X11ScreenCapture:
         from Xlib import display as xdisplay
         self._display = xdisplay.Display()
         self._root = self._display.screen().root
+        self._screen_size: tuple[int, int] | None = None
+
+        # Ask for RandR screen-change events so the cached size can be
+        # invalidated when monitors are added, removed or resized.
+        self._randr_event = None
+        try:
+            from Xlib.ext import randr
+            if self._display.has_extension("RANDR"):
+                self._root.xrandr_select_input(randr.RRScreenChangeNotifyMask)
+                self._randr_event = (
+                    self._display.extension_event.ScreenChangeNotify
+                )
+        except Exception:
+            pass
+
+    def _get_screen_size(self) -> tuple[int, int]:
+        """Return the cached root size, refreshing it after a RandR change."""
+        while self._display.pending_events():
+            event = self._display.next_event()
+            if self._randr_event is not None and event.type == self._randr_event:
+                self._screen_size = None
+        if self._screen_size is None:
+            geom = self._root.get_geometry()
+            self._screen_size = (geom.width, geom.height)
+        return self._screen_size
 
     def capture_fullscreen(self) -> GdkPixbuf.Pixbuf:
         """Capture the entire screen."""
-        geom = self._root.get_geometry()
-        return self.capture_region(0, 0, geom.width, geom.height)
+        width, height = self._get_screen_size()
+        return self.capture_region(0, 0, width, height)
+
+    def capture_fullscreen_async(
+        self, callback: Callable[[GdkPixbuf.Pixbuf | None, str | None], None],
+    ) -> None:
+        """Capture the entire screen and hand it to ``callback(pixbuf, error)``.
+
+        XGetImage is a single round trip, so this completes synchronously; it
+        exists to mirror the portal backend's non-blocking API.
+        """
+        try:
+            pixbuf = self.capture_fullscreen()
+        except Exception as e:
+            callback(None, str(e))
+            return
+        callback(pixbuf, None)
 
     def capture_region(self, x: int, y: int, width: int, height: int) -> GdkPixbuf.Pixbuf:
         """Capture a rectangular region of the screen."""
         raw = self._root.get_image(x, y, width, height, 2, 0xFFFFFFFF)  # ZPixmap
-        image = Image.frombytes("RGBX", (width, height), raw.data, "raw", "BGRX")
-        image = image.convert("RGB")
-        return self._pil_to_pixbuf(image)
+        return bgrx_to_pixbuf(raw.data, width, height)
 
     def capture_window(self, window_id: int) -> GdkPixbuf.Pixbuf:
         """Capture a specific window by its X11 window ID."""
@@ -43,44 +85,40 @@ class X11ScreenCapture:
     def capture_freeform(self, x: int, y: int, width: int, height: int,
                          points: list[tuple[int, int]]) -> GdkPixbuf.Pixbuf:
         """Capture a freeform region defined by polygon points."""
+        x, y, width, height = polygon_bounds(x, y, width, height, points)
         raw = self._root.get_image(x, y, width, height, 2, 0xFFFFFFFF)
-        image = Image.frombytes("RGBX", (width, height), raw.data, "raw", "BGRX")
-        image = image.convert("RGBA")
-
-        # Create polygon mask
-        from PIL import ImageDraw
-        mask = Image.new("L", (width, height), 0)
-        draw = ImageDraw.Draw(mask)
-        # Translate points to local coordinates
-        local_points = [(px - x, py - y) for px, py in points]
-        if len(local_points) >= 3:
-            draw.polygon(local_points, fill=255)
-        image.putalpha(mask)
-
-        return self._pil_to_pixbuf(image)
+        # Decode straight to RGBA; the padding byte lands in the alpha band,
+        # which putalpha() overwrites in place without another conversion.
+        image = Image.frombytes("RGBA", (width, height), raw.data, "raw", "BGRA")
+        image.putalpha(polygon_mask(width, height, points, x, y))
+
+        return pil_to_pixbuf(image)
+
+    def capture_freeform_async(
+        self, x: int, y: int, width: int, height: int, points: list[tuple[int, int]],
+        callback: Callable[[GdkPixbuf.Pixbuf | None, str | None], None],
+    ) -> None:
+        """Capture a freeform region and hand it to ``callback(pixbuf, error)``.
+
+        Completes synchronously; mirrors the portal backend's API.
+        """
+        try:
+            pixbuf = self.capture_freeform(x, y, width, height, points)
+        except Exception as e:
+            callback(None, str(e))
+            return
+        callback(pixbuf, None)
 
     def capture_desktop_image(self) -> Image.Image:
         """Capture desktop as a PIL Image (for overlay backgrounds)."""
-        geom = self._root.get_geometry()
-        raw = self._root.get_image(0, 0, geom.width, geom.height, 2, 0xFFFFFFFF)
-        image = Image.frombytes("RGBX", (geom.width, geom.height), raw.data, "raw", "BGRX")
+        width, height = self._get_screen_size()
+        raw = self._root.get_image(0, 0, width, height, 2, 0xFFFFFFFF)
+        image = Image.frombytes("RGBX", (width, height), raw.data, "raw", "BGRX")
         return image.convert("RGB")
 
     def get_screen_size(self) -> tuple[int, int]:
         """Get the root window size."""
-        geom = self._root.get_geometry()
-        return geom.width, geom.height
-
-    @staticmethod
-    def _pil_to_pixbuf(image: Image.Image) -> GdkPixbuf.Pixbuf:
-        """Convert a PIL Image to a GdkPixbuf.Pixbuf."""
-        buf = io.BytesIO()
-        image.save(buf, format="PNG")
-        buf.seek(0)
-        loader = GdkPixbuf.PixbufLoader.new_with_type("png")
-        loader.write(buf.read())
-        loader.close()
-        return loader.get_pixbuf()
+        return self._get_screen_size()
 
     def close(self) -> None:
         self._display.close()
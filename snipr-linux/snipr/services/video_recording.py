@@ -3,32 +3,120 @@
 from __future__ import annotations
 
 import os
+import shlex
 import subprocess
 import tempfile
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
 from typing import Callable
 
-from gi.repository import GLib
+from gi.repository import Gio, GLib
 
 from snipr.models.recording_state import RecordingState
 from snipr.services.display_server import DisplayServer
 
+# Verbose FFmpeg startup logging (SNIPR_DEBUG=1)
+_DEBUG = bool(os.environ.get("SNIPR_DEBUG"))
+
+VAAPI_DEVICE = "/dev/dri/renderD128"
+
+# (global options, encoder options) per H.264 encoder
+_ENCODERS = {
+    "vaapi": (
+        ["-vaapi_device", VAAPI_DEVICE],
+        ["-vf", "format=nv12,hwupload", "-c:v", "h264_vaapi", "-qp", "23"],
+    ),
+    "nvenc": (
+        [],
+        ["-c:v", "h264_nvenc", "-preset", "p1", "-cq", "23", "-pix_fmt", "yuv420p"],
+    ),
+    "libx264": (
+        [],
+        ["-c:v", "libx264", "-preset", "ultrafast", "-crf", "23", "-pix_fmt", "yuv420p"],
+    ),
+}
+
+
+# Encoder picked by the background probe; None until it has finished
+_detected_encoder: str | None = None
+_probe_started = False
+
+
+def start_encoder_probe() -> None:
+    """Detect the H.264 encoder on a background thread, once per process.
+
+    The probe runs FFmpeg up to twice and can take seconds, so it must never
+    run on the GTK main thread; recordings started before it finishes use
+    libx264.
+    """
+    global _probe_started
+    if _probe_started:
+        return
+    _probe_started = True
+
+    def run():
+        global _detected_encoder
+        _detected_encoder = detect_encoder()
+
+    threading.Thread(target=run, name="snipr-encoder-probe", daemon=True).start()
+
+
+def current_encoder() -> str:
+    """The encoder to record with right now: the probe's result, or libx264."""
+    return _detected_encoder or "libx264"
+
+
+def detect_encoder() -> str:
+    """Pick the H.264 encoder to record with, preferring GPU encoders.
+
+    A candidate is used only if FFmpeg can encode a test frame with it, so a
+    listed-but-broken driver falls back to libx264. Set SNIPR_HW_ENCODE=0 to
+    always encode on the CPU. This blocks on FFmpeg; call it through
+    start_encoder_probe().
+    """
+    if os.environ.get("SNIPR_HW_ENCODE") == "0":
+        return "libx264"
+    candidates = []
+    if os.path.exists(VAAPI_DEVICE):
+        candidates.append("vaapi")
+    if os.path.exists("/dev/nvidia0"):
+        candidates.append("nvenc")
+    for name in candidates:
+        global_opts, encoder_opts = _ENCODERS[name]
+        probe = [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", *global_opts,
+            "-f", "lavfi", "-i", "color=c=black:s=256x256", "-frames:v", "1",
+            *encoder_opts, "-f", "null", "-",
+        ]
+        try:
+            result = subprocess.run(probe, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                    stderr=subprocess.DEVNULL, timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            continue
+        if result.returncode == 0:
+            return name
+    return "libx264"
+
 
 class VideoRecordingService:
     def __init__(self, display_server: DisplayServer):
         self._display_server = display_server
-        self._process: subprocess.Popen | None = None
+        # Normally already running (see SniprApplication.do_startup)
+        start_encoder_probe()
+        self._process: Gio.Subprocess | None = None
         self._state = RecordingState.IDLE
         self._duration_seconds = 0.0
         self._timer_id: int | None = None
         self._current_path: str | None = None
         self._pipewire_node_id: str | None = None
+        self._stderr_log = None
 
         # Callbacks
         self.on_state_changed: Callable[[RecordingState], None] | None = None
         self.on_duration_changed: Callable[[float], None] | None = None
-        self.on_recording_completed: Callable[[str], None] | None = None
+        self.on_recording_completed: Callable[[str, int], None] | None = None
         self.on_recording_failed: Callable[[str], None] | None = None
 
     @property
@@ -70,32 +158,52 @@ class VideoRecordingService:
 
         self._set_state(RecordingState.PREPARING)
 
-        # Generate temp output path
+        # Reserve a unique temp output path; two recordings started within
+        # the same second must not share a file. FFmpeg's -y overwrites the
+        # empty placeholder.
         temp_dir = Path(tempfile.gettempdir()) / "snipr"
         temp_dir.mkdir(exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self._current_path = str(temp_dir / f"Recording_{timestamp}.mp4")
+        fd, self._current_path = tempfile.mkstemp(
+            prefix=f"Recording_{datetime.now():%Y%m%d_%H%M%S}_", suffix=".mp4", dir=temp_dir,
+        )
+        # mkstemp creates the file 0600 and FFmpeg writes into that inode,
+        # which saving links or copies as-is; give it the usual umask mode.
+        umask = os.umask(0)
+        os.umask(umask)
+        os.fchmod(fd, 0o666 & ~umask)
+        os.close(fd)
 
         try:
             cmd = self._build_ffmpeg_command(region)
-            print(f"[Snipr] Starting FFmpeg: {' '.join(cmd)}", flush=True)
-            self._process = subprocess.Popen(
-                cmd,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
+            if _DEBUG:
+                print(f"[Snipr] Starting FFmpeg: {shlex.join(cmd)}", flush=True)
+            # FFmpeg's stderr goes to an anonymous temp file rather than a pipe
+            # nobody reads while recording; a full pipe would stall the encoder.
+            self._stderr_log = tempfile.TemporaryFile(prefix="snipr_ffmpeg_", suffix=".log")
+            launcher = Gio.SubprocessLauncher.new(
+                Gio.SubprocessFlags.STDIN_PIPE | Gio.SubprocessFlags.STDOUT_SILENCE
             )
+            launcher.take_stderr_fd(os.dup(self._stderr_log.fileno()))
+            self._process = launcher.spawnv(cmd)
             self._duration_seconds = 0.0
             self._set_state(RecordingState.RECORDING)
             self._start_duration_timer()
-            print(f"[Snipr] Recording started, PID={self._process.pid}", flush=True)
+            if _DEBUG:
+                print(f"[Snipr] Recording started, PID={self._process.get_identifier()}", flush=True)
         except Exception as e:
+            self._close_log(self._stderr_log)
+            self._stderr_log = None
+            try:
+                os.remove(self._current_path)
+            except OSError:
+                pass
             self._set_state(RecordingState.FAILED)
             if self.on_recording_failed:
                 self.on_recording_failed(f"Failed to start recording: {e}")
 
     def _build_ffmpeg_command(self, region: tuple[int, int, int, int] | None) -> list[str]:
-        cmd = ["ffmpeg", "-y"]
+        global_opts, encoder_opts = _ENCODERS[current_encoder()]
+        cmd = ["ffmpeg", "-y", *global_opts]
 
         if self._display_server == DisplayServer.WAYLAND and self._pipewire_node_id:
             # PipeWire source for Wayland
@@ -118,18 +226,15 @@ class VideoRecordingService:
                 cmd += ["-i", display]
 
         # Encoding settings
-        cmd += [
-            "-c:v", "libx264",
-            "-preset", "ultrafast",
-            "-crf", "23",
-            "-pix_fmt", "yuv420p",
-            "-r", "30",
-            self._current_path,
-        ]
+        cmd += [*encoder_opts, "-r", "30", self._current_path]
         return cmd
 
     def stop_recording(self) -> None:
-        """Gracefully stop the current recording."""
+        """Gracefully stop the current recording.
+
+        FFmpeg is asked to quit and then reaped asynchronously by the GLib
+        main loop, so all state changes happen on the main thread.
+        """
         if self._process is None or self._state != RecordingState.RECORDING:
             return
 
@@ -138,72 +243,96 @@ class VideoRecordingService:
 
         proc = self._process
         self._process = None
+        log = self._stderr_log
+        self._stderr_log = None
+        file_path = self._current_path
+        timed_out = False
+
+        def on_timeout():
+            nonlocal timed_out
+            timed_out = True
+            proc.force_exit()
+            return False
+
+        timeout_id = GLib.timeout_add_seconds(10, on_timeout)
+
+        def on_exited(_proc, result):
+            if not timed_out:
+                GLib.source_remove(timeout_id)
+            try:
+                proc.wait_finish(result)
+            except GLib.Error as e:
+                self._close_log(log)
+                self._fail_recording(e.message)
+                return
+            if timed_out:
+                self._close_log(log)
+                self._fail_recording("Recording stop timed out")
+                return
+
+            stderr_data = self._read_log_tail(log)
+            returncode = proc.get_exit_status() if proc.get_if_exited() else -1
+            try:
+                file_size = os.stat(file_path).st_size if file_path else -1
+            except OSError:
+                file_size = -1
+            print(f"[Snipr] FFmpeg exited: code={returncode}, file={file_path}, size={file_size}", flush=True)
+            if stderr_data:
+                # Print last few lines of stderr for diagnostics
+                lines = stderr_data.strip().split('\n')
+                for line in lines[-5:]:
+                    print(f"[Snipr] ffmpeg: {line}", flush=True)
+
+            if returncode == 0 and file_path and file_size > 0:
+                self._set_state(RecordingState.COMPLETED)
+                if self.on_recording_completed:
+                    self.on_recording_completed(file_path, file_size)
+            else:
+                self._fail_recording(f"FFmpeg exited with code {returncode}: {stderr_data[-500:]}")
+
+        # "q" asks FFmpeg to finalize the file and exit. One byte into an
+        # otherwise idle pipe can't block, so a plain write is fine here.
+        try:
+            proc.get_stdin_pipe().write_bytes(GLib.Bytes.new(b"q"), None)
+        except GLib.Error:
+            pass  # FFmpeg already exited
+        self._close_pipes(proc)
+        proc.wait_async(None, on_exited)
 
-        import threading
+    def _fail_recording(self, message: str) -> None:
+        self._set_state(RecordingState.FAILED)
+        if self.on_recording_failed:
+            self.on_recording_failed(message)
 
-        def _stop_worker():
+    @staticmethod
+    def _close_pipes(proc: Gio.Subprocess) -> None:
+        """Safely close FFmpeg's stdin pipe."""
+        pipe = proc.get_stdin_pipe()
+        if pipe:
             try:
-                # communicate() sends input, drains stdout/stderr, and waits
-                # This avoids deadlocks from full pipe buffers
-                _, stderr_bytes = proc.communicate(input=b"q", timeout=10)
-                stderr_data = stderr_bytes.decode(errors="replace") if stderr_bytes else ""
-                returncode = proc.returncode
-                file_path = self._current_path
-                file_size = os.path.getsize(file_path) if file_path and os.path.exists(file_path) else -1
-                print(f"[Snipr] FFmpeg exited: code={returncode}, file={file_path}, size={file_size}", flush=True)
-                if stderr_data:
-                    # Print last few lines of stderr for diagnostics
-                    lines = stderr_data.strip().split('\n')
-                    for line in lines[-5:]:
-                        print(f"[Snipr] ffmpeg: {line}", flush=True)
-
-                def _on_done():
-                    if returncode == 0 and file_path and file_size > 0:
-                        self._set_state(RecordingState.COMPLETED)
-                        if self.on_recording_completed:
-                            self.on_recording_completed(file_path)
-                    else:
-                        self._set_state(RecordingState.FAILED)
-                        if self.on_recording_failed:
-                            self.on_recording_failed(
-                                f"FFmpeg exited with code {returncode}: {stderr_data[-500:]}")
-
-                GLib.idle_add(_on_done)
-
-            except subprocess.TimeoutExpired:
-                proc.kill()
-                proc.wait()
-
-                def _on_timeout():
-                    self._set_state(RecordingState.FAILED)
-                    if self.on_recording_failed:
-                        self.on_recording_failed("Recording stop timed out")
-
-                GLib.idle_add(_on_timeout)
-
-            except Exception as e:
-                self._close_pipes(proc)
-                err_msg = str(e)
-
-                def _on_error():
-                    self._set_state(RecordingState.FAILED)
-                    if self.on_recording_failed:
-                        self.on_recording_failed(err_msg)
-
-                GLib.idle_add(_on_error)
-
-        thread = threading.Thread(target=_stop_worker, daemon=True)
-        thread.start()
+                pipe.close(None)
+            except GLib.Error:
+                pass
+
+    @classmethod
+    def _read_log_tail(cls, log, max_bytes: int = 4096) -> str:
+        """Return the last ``max_bytes`` of FFmpeg's stderr log and close it."""
+        if log is None:
+            return ""
+        try:
+            size = log.seek(0, os.SEEK_END)
+            log.seek(max(0, size - max_bytes))
+            return log.read().decode(errors="replace")
+        finally:
+            cls._close_log(log)
 
     @staticmethod
-    def _close_pipes(proc: subprocess.Popen) -> None:
-        """Safely close all pipes on a process."""
-        for pipe in (proc.stdin, proc.stdout, proc.stderr):
-            if pipe:
-                try:
-                    pipe.close()
-                except Exception:
-                    pass
+    def _close_log(log) -> None:
+        if log is not None:
+            try:
+                log.close()
+            except Exception:
+                pass
 
     def cancel_recording(self) -> None:
         """Cancel and discard the current recording."""
@@ -212,14 +341,16 @@ class VideoRecordingService:
             proc = self._process
             self._process = None
             try:
-                proc.kill()
-                proc.wait(timeout=5)
-            except Exception:
+                proc.force_exit()
+                proc.wait(None)
+            except GLib.Error:
                 pass
             self._close_pipes(proc)
+        self._close_log(self._stderr_log)
+        self._stderr_log = None
 
         # Delete incomplete file
-        if self._current_path and os.path.exists(self._current_path):
+        if self._current_path:
             try:
                 os.remove(self._current_path)
             except OSError:
@@ -228,17 +359,19 @@ class VideoRecordingService:
         self._set_state(RecordingState.IDLE)
 
     def _start_duration_timer(self) -> None:
-        self._duration_seconds = 0.0
+        # Duration is sampled from the monotonic clock, so the tick rate only
+        # affects how often the UI refreshes, not accuracy.
+        start = time.monotonic()
 
         def tick():
             if self._state == RecordingState.RECORDING:
-                self._duration_seconds += 0.1
+                self._duration_seconds = time.monotonic() - start
                 if self.on_duration_changed:
                     self.on_duration_changed(self._duration_seconds)
                 return True  # Continue timer
             return False  # Stop timer
 
-        self._timer_id = GLib.timeout_add(100, tick)
+        self._timer_id = GLib.timeout_add(250, tick)
 
     def _stop_duration_timer(self) -> None:
         if self._timer_id is not None:
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import time
 from dataclasses import dataclass
 
 
@@ -18,69 +19,141 @@ class WindowInfo:
 class WindowEnumerationService:
     """Enumerate visible windows on X11 via _NET_CLIENT_LIST."""
 
+    # Enumeration costs several X round trips per window, so results are
+    # reused for this long (seconds) before the server is asked again.
+    CACHE_TTL = 0.25
+
+    def __init__(self):
+        self._cache: tuple[float, list[WindowInfo]] | None = None
+        self._display = None
+
     def get_windows(self) -> list[WindowInfo]:
+        now = time.monotonic()
+        if self._cache is not None and now - self._cache[0] < self.CACHE_TTL:
+            return self._cache[1]
         try:
-            return self._get_windows_xlib()
+            windows = self._get_windows_xlib()
         except Exception:
-            return []
+            # The connection may have dropped; reconnect once and retry
+            self._disconnect()
+            try:
+                windows = self._get_windows_xlib()
+            except Exception:
+                windows = []
+        self._cache = (now, windows)
+        return windows
+
+    def invalidate(self) -> None:
+        """Drop cached results so the next call re-enumerates."""
+        self._cache = None
+
+    def cleanup(self) -> None:
+        """Close the X connection."""
+        self._disconnect()
+
+    def _connect(self):
+        """Open the X connection and intern atoms once, on first use."""
+        if self._display is None:
+            from Xlib import display as xdisplay
+
+            d = xdisplay.Display()
+            self._root = d.screen().root
+            self._net_client_list = d.intern_atom("_NET_CLIENT_LIST")
+            self._net_wm_name = d.intern_atom("_NET_WM_NAME")
+            self._utf8_string = d.intern_atom("UTF8_STRING")
+            self._net_frame = d.intern_atom("_NET_FRAME_EXTENTS")
+            self._display = d
+        return self._display
+
+    def _disconnect(self) -> None:
+        if self._display is not None:
+            try:
+                self._display.close()
+            except Exception:
+                pass
+            self._display = None
+
+    def __del__(self):
+        self._disconnect()
 
     def _get_windows_xlib(self) -> list[WindowInfo]:
-        from Xlib import X, display as xdisplay
+        from Xlib import X, Xatom
+        from Xlib.protocol import request
 
-        d = xdisplay.Display()
-        root = d.screen().root
+        d = self._connect()
+        pd = d.display
+        root = self._root
+        net_wm_name = self._net_wm_name
+        utf8_string = self._utf8_string
+        net_frame = self._net_frame
 
         # Get _NET_CLIENT_LIST
-        net_client_list = d.intern_atom("_NET_CLIENT_LIST")
-        net_wm_name = d.intern_atom("_NET_WM_NAME")
-        utf8_string = d.intern_atom("UTF8_STRING")
-        net_frame = d.intern_atom("_NET_FRAME_EXTENTS")
-
-        prop = root.get_full_property(net_client_list, X.AnyPropertyType)
+        prop = root.get_full_property(self._net_client_list, X.AnyPropertyType)
         if prop is None:
-            d.close()
             return []
 
         window_ids = prop.value
+
+        # Requests below are sent deferred and their replies collected in a
+        # second pass, so each batch costs one round trip instead of one per
+        # request per window.
+        attr_reqs = [
+            (wid, request.GetWindowAttributes(display=pd, defer=True, window=wid))
+            for wid in window_ids
+        ]
+        viewable = []
+        for wid, attrs in attr_reqs:
+            try:
+                attrs.reply()
+            except Exception:
+                continue
+            # Iconified/withdrawn clients can't be picked; drop them
+            # before the geometry walk and property lookups below.
+            if attrs.map_state == X.IsViewable:
+                viewable.append(wid)
+
+        batch = [
+            (wid,
+             request.GetGeometry(display=pd, defer=True, drawable=wid),
+             request.QueryTree(display=pd, defer=True, window=wid),
+             self._property_request(pd, wid, net_wm_name, utf8_string, 1024),
+             # Legacy title, fetched alongside so a miss costs no extra trip
+             self._property_request(pd, wid, Xatom.WM_NAME, X.AnyPropertyType, 1024),
+             self._property_request(pd, wid, net_frame, X.AnyPropertyType, 4))
+            for wid in viewable
+        ]
+
         windows = []
+        origins: dict[int, tuple[int, int]] = {}
 
-        for wid in window_ids:
+        for wid, geom, tree, name_req, wm_name_req, frame_req in batch:
             try:
-                win = d.create_resource_object("window", wid)
-                geom = win.get_geometry()
+                geom.reply()
+                tree.reply()
 
                 # Walk parent chain to get absolute position —
                 # translate_coords is unreliable on composited desktops
-                abs_x, abs_y = 0, 0
-                w = win
-                while True:
-                    g = w.get_geometry()
-                    abs_x += g.x
-                    abs_y += g.y
-                    parent = w.query_tree().parent
-                    if parent.id == root.id or parent.id == 0:
-                        break
-                    w = parent
+                abs_x, abs_y = self._absolute_origin(wid, geom, tree.parent, root.id, origins)
 
                 # Get window title
                 title = ""
-                name_prop = win.get_full_property(net_wm_name, utf8_string)
-                if name_prop and name_prop.value:
-                    val = name_prop.value
+                val = self._property_value(name_req)
+                if val:
                     title = val.decode("utf-8", errors="replace") if isinstance(val, bytes) else str(val)
                 if not title:
-                    wm_name = win.get_wm_name()
+                    wm_name = self._property_value(wm_name_req)
                     if wm_name:
-                        title = wm_name.decode("utf-8", errors="replace") if isinstance(wm_name, bytes) else str(wm_name)
+                        encoding = "latin-1" if wm_name_req.property_type == Xatom.STRING else "utf-8"
+                        title = wm_name.decode(encoding, errors="replace") if isinstance(wm_name, bytes) else str(wm_name)
 
                 if not title:
                     continue
 
                 # Get frame extents for accurate geometry
-                frame_prop = win.get_full_property(net_frame, X.AnyPropertyType)
+                frame = self._property_value(frame_req)
                 left = top = right = bottom = 0
-                if frame_prop and len(frame_prop.value) >= 4:
-                    left, right, top, bottom = frame_prop.value[:4]
+                if frame is not None and len(frame) >= 4:
+                    left, right, top, bottom = frame[:4]
 
                 x = abs_x - left
                 y = abs_y - top
@@ -97,9 +170,57 @@ class WindowEnumerationService:
             except Exception:
                 continue
 
-        d.close()
         return windows
 
+    @staticmethod
+    def _property_request(pd, wid: int, atom: int, prop_type: int, length: int):
+        """Send a deferred GetProperty for up to ``length`` 32-bit units."""
+        from Xlib.protocol import request
+
+        return request.GetProperty(
+            display=pd, defer=True, delete=False, window=wid, property=atom,
+            type=prop_type, long_offset=0, long_length=length,
+        )
+
+    @staticmethod
+    def _property_value(req):
+        """Wait for a deferred GetProperty and return its value, or None if unset."""
+        try:
+            req.reply()
+        except Exception:
+            return None
+        if not req.property_type:
+            return None
+        return req.value[1]
+
+    @staticmethod
+    def _absolute_origin(wid: int, geom, parent, root_id: int,
+                         origins: dict[int, tuple[int, int]]) -> tuple[int, int]:
+        """Sum window offsets up the parent chain to the root.
+
+        ``geom`` and ``parent`` are the window's already-fetched geometry and
+        parent, and ``origins`` memoizes the absolute origin of every window
+        visited, so ancestors shared between clients (WM containers, virtual
+        roots) are only queried once per enumeration.
+        """
+        chain = [(wid, geom.x, geom.y)]
+        while True:
+            if parent.id == root_id or parent.id == 0:
+                x, y = 0, 0
+                break
+            if parent.id in origins:
+                x, y = origins[parent.id]
+                break
+            g = parent.get_geometry()
+            chain.append((parent.id, g.x, g.y))
+            parent = parent.query_tree().parent
+
+        for wid, dx, dy in reversed(chain):
+            x += dx
+            y += dy
+            origins[wid] = (x, y)
+        return x, y
+
     def get_window_at_position(self, x: int, y: int) -> WindowInfo | None:
         """Get the topmost window at the given screen coordinates."""
         windows = self.get_windows()
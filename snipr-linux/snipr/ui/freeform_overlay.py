@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from array import array
 from typing import Callable
 
 import gi
@@ -11,6 +12,10 @@ gi.require_version("Gtk", "4.0")
 from gi.repository import Gdk, GdkPixbuf, Gtk
 import cairo
 
+from snipr.ui.overlay_surfaces import (
+    PREVIEW_DOWNSCALE_WIDTH, RedrawScheduler, make_dim_surface, reusable_surface,
+)
+
 
 class FreeformSelectionOverlay(Gtk.Window):
     """Fullscreen overlay for drawing a freeform selection polygon.
@@ -21,7 +26,7 @@ class FreeformSelectionOverlay(Gtk.Window):
 
     def __init__(
         self,
-        capture_service,
+        desktop_pixbuf: GdkPixbuf.Pixbuf,
         on_selected: Callable[[int, int, int, int, list[tuple[int, int]]], None],
         on_cancelled: Callable[[], None],
     ):
@@ -30,15 +35,16 @@ class FreeformSelectionOverlay(Gtk.Window):
             decorated=False,
             modal=True,
         )
-        self._capture_service = capture_service
+        # Captured by the caller before the overlay is shown
+        self._desktop_pixbuf = desktop_pixbuf
         self._on_selected = on_selected
         self._on_cancelled = on_cancelled
 
         self._is_drawing = False
-        self._points: list[tuple[float, float]] = []
-
-        # Capture desktop
-        self._desktop_pixbuf = self._capture_service.capture_fullscreen()
+        # Flat x0, y0, x1, y1, ... float32 buffer: no tuple or boxed float per sample
+        self._coords = array("f")
+        # Scratch context that accumulates the stroke as a native cairo path
+        self._path_ctx: cairo.Context | None = None
 
         self.fullscreen()
         self.set_cursor(Gdk.Cursor.new_from_name("crosshair", None))
@@ -46,6 +52,7 @@ class FreeformSelectionOverlay(Gtk.Window):
         self._drawing_area = Gtk.DrawingArea()
         self._drawing_area.set_draw_func(self._on_draw)
         self.set_child(self._drawing_area)
+        self._redraw = RedrawScheduler(self._drawing_area)
 
         # Input controllers
         click = Gtk.GestureClick()
@@ -63,60 +70,60 @@ class FreeformSelectionOverlay(Gtk.Window):
         self.add_controller(key)
 
         self._desktop_surface = self._pixbuf_to_surface(self._desktop_pixbuf)
+        self._dim_surface = make_dim_surface(self._desktop_surface, downscale=True)
 
     def _pixbuf_to_surface(self, pixbuf: GdkPixbuf.Pixbuf) -> cairo.ImageSurface:
         w = pixbuf.get_width()
         h = pixbuf.get_height()
-        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, w, h)
+        # On very large desktops keep the backdrop at half resolution: it is
+        # only a preview (the capture itself is taken at full resolution) and
+        # a quarter of the pixels means a quarter of the per-frame blit cost.
+        # The device scale keeps it drawing at full size in user space.
+        scale = 2 if w > PREVIEW_DOWNSCALE_WIDTH else 1
+        if scale > 1:
+            pixbuf = pixbuf.scale_simple(w // scale, h // scale, GdkPixbuf.InterpType.BILINEAR)
+        surface = reusable_surface("desktop", w // scale, h // scale)
+        surface.set_device_scale(1 / scale, 1 / scale)
         ctx = cairo.Context(surface)
+        ctx.set_operator(cairo.OPERATOR_SOURCE)
+        ctx.scale(scale, scale)
         Gdk.cairo_set_source_pixbuf(ctx, pixbuf, 0, 0)
         ctx.paint()
         return surface
 
     def _on_draw(self, area, ctx: cairo.Context, width: int, height: int):
-        # Draw desktop
-        ctx.set_source_surface(self._desktop_surface, 0, 0)
+        # Dimmed desktop
+        ctx.set_source_surface(self._dim_surface, 0, 0)
         ctx.paint()
 
-        # Dim overlay
-        ctx.set_source_rgba(0, 0, 0, 0.4)
+        if len(self._coords) >= 6:
+            path = self._path_ctx.copy_path()
 
-        if len(self._points) >= 3:
-            # Draw dim with hole for freeform shape
-            ctx.rectangle(0, 0, width, height)
-            ctx.new_sub_path()
-            ctx.move_to(*self._points[0])
-            for px, py in self._points[1:]:
-                ctx.line_to(px, py)
+            # Reveal the undimmed desktop inside the freeform shape
+            ctx.append_path(path)
             ctx.close_path()
             ctx.set_fill_rule(cairo.FILL_RULE_EVEN_ODD)
-            ctx.fill()
+            ctx.save()
+            ctx.clip()
+            ctx.set_source_surface(self._desktop_surface, 0, 0)
+            ctx.paint()
+            ctx.restore()
 
             # Draw the freeform path outline
             ctx.set_source_rgba(0.2, 0.5, 1.0, 0.9)
             ctx.set_line_width(2)
-            ctx.move_to(*self._points[0])
-            for px, py in self._points[1:]:
-                ctx.line_to(px, py)
+            ctx.append_path(path)
             if not self._is_drawing:
                 ctx.close_path()
             ctx.stroke()
-        elif len(self._points) > 0:
+        elif self._coords:
             # Just the line so far
-            ctx.rectangle(0, 0, width, height)
-            ctx.fill()
-
             ctx.set_source_rgba(0.2, 0.5, 1.0, 0.9)
             ctx.set_line_width(2)
-            ctx.move_to(*self._points[0])
-            for px, py in self._points[1:]:
-                ctx.line_to(px, py)
+            ctx.append_path(self._path_ctx.copy_path())
             ctx.stroke()
         else:
-            # Full dim with instructions
-            ctx.rectangle(0, 0, width, height)
-            ctx.fill()
-
+            # Instructions
             ctx.set_source_rgba(1, 1, 1, 0.8)
             ctx.set_font_size(18)
             text = "Click and drag to draw a freeform selection. Press Escape to cancel."
@@ -126,38 +133,56 @@ class FreeformSelectionOverlay(Gtk.Window):
 
     def _on_press(self, gesture, n_press, x, y):
         self._is_drawing = True
-        self._points = [(x, y)]
+        self._coords = array("f", (x, y))
+        # Bounding box, kept up to date as points are added
+        self._min_x = self._max_x = x
+        self._min_y = self._max_y = y
+        self._path_ctx = cairo.Context(cairo.ImageSurface(cairo.FORMAT_A8, 1, 1))
+        self._path_ctx.move_to(x, y)
+
+    def _add_point(self, x, y):
+        self._coords.append(x)
+        self._coords.append(y)
+        self._path_ctx.line_to(x, y)
+        if x < self._min_x:
+            self._min_x = x
+        elif x > self._max_x:
+            self._max_x = x
+        if y < self._min_y:
+            self._min_y = y
+        elif y > self._max_y:
+            self._max_y = y
 
     def _on_motion(self, controller, x, y):
         if self._is_drawing:
-            self._points.append((x, y))
-            self._drawing_area.queue_draw()
+            # Skip sub-pixel moves; they add path segments but no visible detail
+            if abs(x - self._coords[-2]) + abs(y - self._coords[-1]) < 1:
+                return
+            self._add_point(x, y)
+            self._redraw.schedule()
 
     def _on_release(self, gesture, n_press, x, y):
         if not self._is_drawing:
             return
         self._is_drawing = False
-        self._points.append((x, y))
+        self._add_point(x, y)
 
-        if len(self._points) < 3:
-            self._points.clear()
+        if len(self._coords) < 6:
+            del self._coords[:]
             self._drawing_area.queue_draw()
             return
 
-        # Calculate bounding box
-        xs = [p[0] for p in self._points]
-        ys = [p[1] for p in self._points]
-        bx = int(min(xs))
-        by = int(min(ys))
-        bw = int(max(xs) - bx)
-        bh = int(max(ys) - by)
+        bx = int(self._min_x)
+        by = int(self._min_y)
+        bw = int(self._max_x - bx)
+        bh = int(self._max_y - by)
 
         if bw < 5 or bh < 5:
-            self._points.clear()
+            del self._coords[:]
             self._drawing_area.queue_draw()
             return
 
-        int_points = [(int(px), int(py)) for px, py in self._points]
+        int_points = list(zip(map(int, self._coords[0::2]), map(int, self._coords[1::2])))
         self.close()
         self._on_selected(bx, by, bw, bh, int_points)
 
@@ -3,6 +3,8 @@
 from __future__ import annotations
 
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import gi
@@ -11,11 +13,16 @@ gi.require_version("Gtk", "4.0")
 gi.require_version("Adw", "1")
 gi.require_version("GdkPixbuf", "2.0")
 
-from gi.repository import Adw, Gdk, GdkPixbuf, Gio, GLib, Gtk
+from gi.repository import Adw, GdkPixbuf, Gio, GLib, Gtk
 
 from snipr.models.capture_mode import CaptureMode
 from snipr.models.capture_result import CaptureResult
 from snipr.models.recording_state import RecordingState
+from snipr.services.pixbuf_utils import pixbuf_to_texture
+from snipr.ui.freeform_overlay import FreeformSelectionOverlay
+from snipr.ui.recording_indicator import RecordingIndicator
+from snipr.ui.rectangle_overlay import RectangleSelectionOverlay
+from snipr.ui.window_overlay import WindowSelectionOverlay
 
 
 AVAILABLE_MODES = [
@@ -30,8 +37,31 @@ AVAILABLE_MODES = [
 
 AVAILABLE_DELAYS = [0, 1, 2, 3, 4, 5]
 
+# Timestamp in suggested save file names
+_TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+
+# MainWindow method that starts a capture in each mode
+_MODE_DISPATCH = {
+    CaptureMode.RECTANGLE_SNIP: "_show_rectangle_overlay",
+    CaptureMode.RECTANGLE_VIDEO: "_show_rectangle_overlay",
+    CaptureMode.WINDOW_SNIP: "_show_window_overlay",
+    CaptureMode.WINDOW_VIDEO: "_show_window_overlay",
+    CaptureMode.FREEFORM_SNIP: "_show_freeform_overlay",
+    CaptureMode.FULLSCREEN_SNIP: "_capture_fullscreen",
+    CaptureMode.FULLSCREEN_VIDEO: "_capture_fullscreen",
+}
+
+
+# Save dialog filters (name, glob pattern) per capture kind
+SAVE_FILTERS = {
+    "image": [("PNG Image", "*.png"), ("JPEG Image", "*.jpg"), ("Bitmap Image", "*.bmp")],
+    "video": [("MP4 Video", "*.mp4")],
+}
+
 
 class MainWindow(Adw.ApplicationWindow):
+    _filter_cache: dict[str, Gio.ListStore] = {}
+
     def __init__(self, **kwargs):
         super().__init__(
             title="Snipr",
@@ -49,16 +79,32 @@ class MainWindow(Adw.ApplicationWindow):
         self._recording_indicator = None
         self._active_overlay = None
         self._video_saved = False
-
-        # Connect video service callbacks
-        vs = self._app.video_service
-        vs.on_state_changed = self._on_recording_state_changed
-        vs.on_duration_changed = self._on_recording_duration_changed
-        vs.on_recording_completed = self._on_recording_completed
-        vs.on_recording_failed = self._on_recording_failed
+        # Result whose video is being copied by an in-flight save
+        self._pending_save: CaptureResult | None = None
+        self._video_callbacks_connected = False
+        # Whole seconds last pushed to the recording indicator
+        self._shown_duration = 0
+        # Window enumeration, overlapped with the desktop capture
+        self._enum_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snipr-enum")
 
         self._build_ui()
 
+    @property
+    def _video_service(self):
+        """The app's video service, with our callbacks connected on first use."""
+        vs = self._app.video_service
+        if not self._video_callbacks_connected:
+            vs.on_state_changed = self._on_recording_state_changed
+            vs.on_duration_changed = self._on_recording_duration_changed
+            vs.on_recording_completed = self._on_recording_completed
+            vs.on_recording_failed = self._on_recording_failed
+            self._video_callbacks_connected = True
+        return vs
+
+    def _is_recording(self) -> bool:
+        return (self._app.has_video_service
+                and self._app.video_service.state == RecordingState.RECORDING)
+
     def _build_ui(self):
         # Adw.ToolbarView manages header bar + content for AdwApplicationWindow
         toolbar_view = Adw.ToolbarView()
@@ -153,6 +199,10 @@ class MainWindow(Adw.ApplicationWindow):
         self._copy_btn.connect("clicked", self._on_copy_clicked)
         info_bar.append(self._copy_btn)
 
+        self._save_spinner = Gtk.Spinner()
+        self._save_spinner.set_visible(False)
+        info_bar.append(self._save_spinner)
+
         self._save_btn = Gtk.Button(label="Save")
         self._save_btn.connect("clicked", self._on_save_clicked)
         info_bar.append(self._save_btn)
@@ -180,7 +230,7 @@ class MainWindow(Adw.ApplicationWindow):
 
     def start_new_capture(self):
         """Begin a new capture based on the selected mode."""
-        if self._app.video_service.state == RecordingState.RECORDING:
+        if self._is_recording():
             return
 
         self._hide_preview()
@@ -189,84 +239,95 @@ class MainWindow(Adw.ApplicationWindow):
         self.set_visible(False)
 
         if self._delay_seconds > 0:
-            self._start_delay_countdown(self._delay_seconds)
+            GLib.timeout_add_seconds(self._delay_seconds, self._execute_capture)
         else:
             # Small delay to let window hide
             GLib.timeout_add(150, self._execute_capture)
 
-    def _start_delay_countdown(self, remaining: int):
-        if remaining <= 0:
-            self._execute_capture()
-            return
-        GLib.timeout_add(1000, self._start_delay_countdown, remaining - 1)
-
     def _execute_capture(self):
-        mode = self._selected_mode
-
-        if mode.requires_rectangle_selection:
-            self._show_rectangle_overlay()
-        elif mode.requires_window_selection:
-            self._show_window_overlay()
-        elif mode.requires_freeform_selection:
-            self._show_freeform_overlay()
-        elif mode.is_fullscreen:
-            self._capture_fullscreen()
-
+        getattr(self, _MODE_DISPATCH[self._selected_mode])()
         return False  # Don't repeat GLib.timeout
 
     def _show_rectangle_overlay(self):
-        from snipr.ui.rectangle_overlay import RectangleSelectionOverlay
-        self._active_overlay = RectangleSelectionOverlay(
-            capture_service=self._app.capture_service,
+        self._open_overlay(lambda pixbuf: RectangleSelectionOverlay(
+            desktop_pixbuf=pixbuf,
             on_selected=self._on_rectangle_selected,
             on_cancelled=self._on_overlay_cancelled,
-        )
-        self._active_overlay.present()
+        ))
 
     def _show_window_overlay(self):
-        from snipr.ui.window_overlay import WindowSelectionOverlay
-        self._active_overlay = WindowSelectionOverlay(
-            capture_service=self._app.capture_service,
+        # Enumerate windows on a worker while the desktop is captured; both
+        # are dominated by round trips on separate connections.
+        window_enum = self._app.window_enum_service
+        # A new selection must see the current window layout, not one cached
+        # from a recent overlay
+        window_enum.invalidate()
+        windows = self._enum_pool.submit(window_enum.get_windows)
+        self._open_overlay(lambda pixbuf: WindowSelectionOverlay(
+            desktop_pixbuf=pixbuf,
+            windows=windows.result(),
             on_selected=self._on_window_selected,
             on_cancelled=self._on_overlay_cancelled,
-        )
-        self._active_overlay.present()
+        ))
 
     def _show_freeform_overlay(self):
-        from snipr.ui.freeform_overlay import FreeformSelectionOverlay
-        self._active_overlay = FreeformSelectionOverlay(
-            capture_service=self._app.capture_service,
+        self._open_overlay(lambda pixbuf: FreeformSelectionOverlay(
+            desktop_pixbuf=pixbuf,
             on_selected=self._on_freeform_selected,
             on_cancelled=self._on_overlay_cancelled,
-        )
-        self._active_overlay.present()
+        ))
+
+    def _open_overlay(self, build):
+        """Capture the desktop, then present ``build(pixbuf)`` over it.
+
+        The capture is asynchronous, so on Wayland the main loop keeps
+        running normally while the portal answers.
+        """
+        def on_captured(pixbuf, error: str | None):
+            if error:
+                self.set_visible(True)
+                self._show_error(f"Capture failed: {error}")
+                return
+            self._active_overlay = build(pixbuf)
+            self._active_overlay.present()
+
+        self._app.capture_service.capture_fullscreen_async(on_captured)
 
     def _capture_fullscreen(self):
         try:
             cs = self._app.capture_service
             if self._selected_mode.is_screenshot:
-                pixbuf = cs.capture_fullscreen()
-                self._last_result = CaptureResult(
-                    mode=self._selected_mode,
-                    screenshot=pixbuf,
-                    capture_region=(0, 0, pixbuf.get_width(), pixbuf.get_height()),
-                )
-                self.set_visible(True)
-                self._show_preview()
+                cs.capture_fullscreen_async(self._on_fullscreen_captured)
             else:
                 # Fullscreen video
-                self._app.video_service.start_recording_fullscreen()
+                self._video_service.start_recording_fullscreen()
                 self._show_recording_indicator()
         except Exception as e:
             self.set_visible(True)
             self._show_error(f"Capture failed: {e}")
 
-    def _on_rectangle_selected(self, x: int, y: int, w: int, h: int):
+    def _on_fullscreen_captured(self, pixbuf, error: str | None):
+        self.set_visible(True)
+        if error:
+            self._show_error(f"Capture failed: {error}")
+            return
+        self._last_result = CaptureResult(
+            mode=self._selected_mode,
+            screenshot=pixbuf,
+            capture_region=(0, 0, pixbuf.get_width(), pixbuf.get_height()),
+        )
+        self._show_preview()
+
+    def _on_rectangle_selected(self, x: int, y: int, w: int, h: int,
+                               desktop_pixbuf: GdkPixbuf.Pixbuf):
         self._active_overlay = None
         try:
-            cs = self._app.capture_service
             if self._selected_mode.is_screenshot:
-                pixbuf = cs.capture_region(x, y, w, h)
+                # Crop from the overlay's frozen desktop rather than
+                # capturing again; copy so the full frame can be freed.
+                w = min(w, desktop_pixbuf.get_width() - x)
+                h = min(h, desktop_pixbuf.get_height() - y)
+                pixbuf = desktop_pixbuf.new_subpixbuf(x, y, w, h).copy()
                 self._last_result = CaptureResult(
                     mode=self._selected_mode,
                     screenshot=pixbuf,
@@ -276,7 +337,7 @@ class MainWindow(Adw.ApplicationWindow):
                 self._show_preview()
             else:
                 # Rectangle video
-                self._app.video_service.start_recording_region(x, y, w, h)
+                self._video_service.start_recording_region(x, y, w, h)
                 self._show_recording_indicator()
         except Exception as e:
             self.set_visible(True)
@@ -304,7 +365,7 @@ class MainWindow(Adw.ApplicationWindow):
                 self._show_preview()
             else:
                 # Window video
-                self._app.video_service.start_recording_window(
+                self._video_service.start_recording_window(
                     window_info.x, window_info.y,
                     window_info.width, window_info.height,
                 )
@@ -316,16 +377,21 @@ class MainWindow(Adw.ApplicationWindow):
     def _on_freeform_selected(self, x: int, y: int, w: int, h: int,
                                points: list[tuple[int, int]]):
         self._active_overlay = None
-        try:
-            cs = self._app.capture_service
-            pixbuf = cs.capture_freeform(x, y, w, h, points)
+
+        def on_captured(pixbuf, error: str | None):
+            self.set_visible(True)
+            if error:
+                self._show_error(f"Capture failed: {error}")
+                return
             self._last_result = CaptureResult(
                 mode=self._selected_mode,
                 screenshot=pixbuf,
                 capture_region=(x, y, w, h),
             )
-            self.set_visible(True)
             self._show_preview()
+
+        try:
+            self._app.capture_service.capture_freeform_async(x, y, w, h, points, on_captured)
         except Exception as e:
             self.set_visible(True)
             self._show_error(f"Capture failed: {e}")
@@ -344,13 +410,12 @@ class MainWindow(Adw.ApplicationWindow):
 
         if result.is_screenshot and result.screenshot:
             pixbuf = result.screenshot
-            texture = Gdk.Texture.new_for_pixbuf(pixbuf)
-            self._preview_picture.set_paintable(texture)
             self._preview_stack.set_visible_child_name("image")
 
             pw = pixbuf.get_width()
             ph = pixbuf.get_height()
             self._info_label.set_text(f"{pw} x {ph} pixels")
+            aspect = pw / ph if ph else 1
 
             # Resize to fit content
             display = self.get_display()
@@ -361,18 +426,28 @@ class MainWindow(Adw.ApplicationWindow):
                     geom = mon.get_geometry()
                     max_w = int(geom.width * 0.8)
                     max_h = int(geom.height * 0.8)
-                    aspect = pw / ph if ph else 1
                     new_w = min(pw + 32, max_w)
                     new_h = min(int((new_w - 32) / aspect + 160), max_h)
                     new_w = max(new_w, 450)
 
+            # Upload a texture sized for the preview rather than the full
+            # capture; the full-resolution pixbuf stays on _last_result for
+            # copy and save.
+            preview_w = (new_w - 32) * self.get_scale_factor()
+            if preview_w < pw:
+                pixbuf = pixbuf.scale_simple(
+                    preview_w, max(1, int(preview_w / aspect)), GdkPixbuf.InterpType.BILINEAR,
+                )
+            self._preview_picture.set_paintable(pixbuf_to_texture(pixbuf))
+
         elif result.is_video and result.video_path:
-            media_file = Gtk.MediaFile.new_for_filename(result.video_path)
-            self._video_player.set_media_stream(media_file)
+            # Opening the media file initializes the demuxer on this thread,
+            # so attach it after the preview has had a chance to paint.
+            GLib.idle_add(self._attach_video, result, priority=GLib.PRIORITY_LOW)
             self._video_player.set_visible(True)
             self._preview_stack.set_visible_child_name("video")
 
-            file_size = os.path.getsize(result.video_path)
+            file_size = result.video_size_bytes
             if file_size > 1024 * 1024:
                 size_str = f"{file_size / (1024 * 1024):.1f} MB"
             else:
@@ -386,6 +461,14 @@ class MainWindow(Adw.ApplicationWindow):
         self.set_size_request(-1, -1)
         self.set_default_size(new_w, new_h)
 
+    def _attach_video(self, result: CaptureResult):
+        # The preview may have been discarded or replaced in the meantime
+        if self._is_preview_visible and self._last_result is result:
+            self._video_player.set_media_stream(
+                Gtk.MediaFile.new_for_filename(result.video_path)
+            )
+        return False
+
     def _hide_preview(self):
         self._preview_picture.set_paintable(None)
         self._video_player.set_media_stream(None)
@@ -396,14 +479,20 @@ class MainWindow(Adw.ApplicationWindow):
         self.set_default_size(450, -1)
         self.set_size_request(450, -1)
 
-        # Cleanup temp video if not saved
-        if not self._video_saved and self._last_result and self._last_result.video_path:
-            path = self._last_result.video_path
-            if os.path.exists(path):
-                try:
-                    os.remove(path)
-                except OSError:
-                    pass
+        # Cleanup temp video if not saved. A save still copying it removes
+        # the file itself once done (see _on_video_saved).
+        result = self._last_result
+        if (not self._video_saved and result and result.video_path
+                and result is not self._pending_save):
+            self._remove_temp_video(result.video_path)
+
+    @staticmethod
+    def _remove_temp_video(path: str):
+        if os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
 
     def _on_copy_clicked(self, btn):
         self.copy_to_clipboard()
@@ -431,77 +520,91 @@ class MainWindow(Adw.ApplicationWindow):
         dialog = Gtk.FileDialog()
 
         if self._last_result.is_screenshot:
-            filter_png = Gtk.FileFilter()
-            filter_png.set_name("PNG Image")
-            filter_png.add_pattern("*.png")
-            filter_jpg = Gtk.FileFilter()
-            filter_jpg.set_name("JPEG Image")
-            filter_jpg.add_pattern("*.jpg")
-            filter_bmp = Gtk.FileFilter()
-            filter_bmp.set_name("Bitmap Image")
-            filter_bmp.add_pattern("*.bmp")
-
-            filters = Gio.ListStore.new(Gtk.FileFilter)
-            filters.append(filter_png)
-            filters.append(filter_jpg)
-            filters.append(filter_bmp)
-            dialog.set_filters(filters)
-
-            from datetime import datetime
+            dialog.set_filters(self._file_filters("image"))
             dialog.set_initial_name(
-                f"Screenshot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
+                f"Screenshot_{time.strftime(_TIMESTAMP_FORMAT)}.png"
             )
             dialog.save(self, None, self._on_screenshot_save_response)
 
         elif self._last_result.is_video and self._last_result.video_path:
-            filter_mp4 = Gtk.FileFilter()
-            filter_mp4.set_name("MP4 Video")
-            filter_mp4.add_pattern("*.mp4")
-
-            filters = Gio.ListStore.new(Gtk.FileFilter)
-            filters.append(filter_mp4)
-            dialog.set_filters(filters)
-
-            from datetime import datetime
+            dialog.set_filters(self._file_filters("video"))
             dialog.set_initial_name(
-                f"Recording_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4"
+                f"Recording_{time.strftime(_TIMESTAMP_FORMAT)}.mp4"
             )
             dialog.save(self, None, self._on_video_save_response)
 
+    @classmethod
+    def _file_filters(cls, kind: str) -> Gio.ListStore:
+        """Return the save dialog's filter list for ``kind``, built once."""
+        filters = cls._filter_cache.get(kind)
+        if filters is None:
+            filters = Gio.ListStore.new(Gtk.FileFilter)
+            for name, pattern in SAVE_FILTERS[kind]:
+                file_filter = Gtk.FileFilter()
+                file_filter.set_name(name)
+                file_filter.add_pattern(pattern)
+                filters.append(file_filter)
+            cls._filter_cache[kind] = filters
+        return filters
+
     def _on_screenshot_save_response(self, dialog, result):
         try:
             file = dialog.save_finish(result)
             path = file.get_path()
             if self._last_result and self._last_result.screenshot:
-                if self._app.clipboard_service.save_pixbuf(self._last_result.screenshot, path):
-                    self._show_toast("Image saved successfully")
-                else:
-                    self._show_error("Failed to save image")
+                self._set_saving(True)
+                self._app.clipboard_service.save_pixbuf_async(
+                    self._last_result.screenshot, path, self._on_screenshot_saved,
+                )
         except GLib.Error:
             pass  # User cancelled
 
+    def _on_screenshot_saved(self, success: bool):
+        self._set_saving(False)
+        if success:
+            self._show_toast("Image saved successfully")
+        else:
+            self._show_error("Failed to save image")
+
+    def _set_saving(self, saving: bool):
+        self._save_spinner.set_visible(saving)
+        self._save_spinner.set_spinning(saving)
+        self._save_btn.set_sensitive(not saving)
+
     def _on_video_save_response(self, dialog, result):
         try:
             file = dialog.save_finish(result)
             dest_path = file.get_path()
-            if self._last_result and self._last_result.video_path:
-                import shutil
-                # Stop video player before copying
-                self._video_player.set_media_stream(None)
-                shutil.copy2(self._last_result.video_path, dest_path)
-                self._video_saved = True
-                # Restart playback
-                media_file = Gtk.MediaFile.new_for_filename(self._last_result.video_path)
-                self._video_player.set_media_stream(media_file)
-                self._show_toast("Video saved successfully")
+            result = self._last_result
+            if result and result.video_path:
+                # The player only reads the file, so it can keep playing
+                self._set_saving(True)
+                self._pending_save = result
+                self._app.clipboard_service.save_file_async(
+                    result.video_path, dest_path,
+                    lambda error: self._on_video_saved(result, error),
+                )
         except GLib.Error:
             pass  # User cancelled
-        except Exception as e:
-            self._show_error(f"Failed to save video: {e}")
+
+    def _on_video_saved(self, result: CaptureResult, error: str | None):
+        self._pending_save = None
+        self._set_saving(False)
+        if result is self._last_result and self._is_preview_visible:
+            if not error:
+                self._video_saved = True
+        else:
+            # Discarded or replaced while copying; _hide_preview left the
+            # temp file for the copy, so clean it up now
+            self._remove_temp_video(result.video_path)
+        if error:
+            self._show_error(f"Failed to save video: {error}")
+            return
+        self._show_toast("Video saved successfully")
 
     def stop_recording(self):
-        if self._app.video_service.state == RecordingState.RECORDING:
-            self._app.video_service.stop_recording()
+        if self._is_recording():
+            self._video_service.stop_recording()
 
     def cancel_or_quit(self) -> bool:
         """Cancel active overlay or recording. Returns True if something was cancelled."""
@@ -510,8 +613,8 @@ class MainWindow(Adw.ApplicationWindow):
             self._active_overlay = None
             self.set_visible(True)
             return True
-        if self._app.video_service.state == RecordingState.RECORDING:
-            self._app.video_service.cancel_recording()
+        if self._is_recording():
+            self._video_service.cancel_recording()
             self._hide_recording_indicator()
             self.set_visible(True)
             return True
@@ -527,14 +630,19 @@ class MainWindow(Adw.ApplicationWindow):
             self._hide_recording_indicator()
 
     def _on_recording_duration_changed(self, seconds: float):
-        if self._recording_indicator:
+        # The service ticks several times a second; the indicator only
+        # shows whole seconds, so forward just the ticks that change it.
+        whole = int(seconds)
+        if self._recording_indicator and whole != self._shown_duration:
+            self._shown_duration = whole
             self._recording_indicator.update_duration(seconds)
 
-    def _on_recording_completed(self, path: str):
+    def _on_recording_completed(self, path: str, size: int):
         self._hide_recording_indicator()
         self._last_result = CaptureResult(
             mode=self._selected_mode,
             video_path=path,
+            video_size_bytes=size,
         )
         self.set_visible(True)
         self._show_preview()
@@ -546,7 +654,7 @@ class MainWindow(Adw.ApplicationWindow):
 
     def _show_recording_indicator(self):
         self._hide_recording_indicator()
-        from snipr.ui.recording_indicator import RecordingIndicator
+        self._shown_duration = 0
         self._recording_indicator = RecordingIndicator(
             on_stop=self.stop_recording,
         )
@@ -0,0 +1,75 @@
+"""Backdrop surfaces and redraw pacing shared by the selection overlays."""
+
+from __future__ import annotations
+
+import cairo
+
+# Desktops wider than this are previewed at half resolution in the overlays
+PREVIEW_DOWNSCALE_WIDTH = 2560
+
+# (role, width, height) -> surface. Only one overlay is open at a time, so
+# every overlay class draws from this single pool.
+_pool: dict[tuple[str, int, int], cairo.ImageSurface] = {}
+
+
+def reusable_surface(role: str, w: int, h: int) -> cairo.ImageSurface:
+    """Return the pooled ARGB32 surface for ``role`` at the given size.
+
+    Full-screen surfaces are tens of megabytes; reusing them across overlay
+    openings avoids reallocating and faulting in fresh memory. Each role
+    keeps just one, whichever overlay asks for it. Callers overwrite the
+    whole surface with OPERATOR_SOURCE.
+    """
+    key = (role, w, h)
+    surface = _pool.get(key)
+    if surface is None:
+        # Only the current screen size is worth keeping per role
+        for stale in [k for k in _pool if k[0] == role]:
+            del _pool[stale]
+        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, w, h)
+        _pool[key] = surface
+    return surface
+
+
+def make_dim_surface(desktop: cairo.ImageSurface, downscale: bool = False) -> cairo.ImageSurface:
+    """Pre-compose the desktop with the 40% dim so frames need one blit.
+
+    With ``downscale``, desktops wider than PREVIEW_DOWNSCALE_WIDTH get a
+    half-resolution dim layer, a quarter of the bytes read per frame; the
+    device scale keeps it drawing at full size in user space.
+    """
+    sx, sy = desktop.get_device_scale()
+    w = round(desktop.get_width() / sx)
+    h = round(desktop.get_height() / sy)
+    scale = 2 if downscale and w > PREVIEW_DOWNSCALE_WIDTH else 1
+    surface = reusable_surface("dim", w // scale, h // scale)
+    surface.set_device_scale(1 / scale, 1 / scale)
+    ctx = cairo.Context(surface)
+    ctx.set_operator(cairo.OPERATOR_SOURCE)
+    ctx.set_source_surface(desktop, 0, 0)
+    ctx.paint()
+    ctx.set_operator(cairo.OPERATOR_OVER)
+    ctx.set_source_rgba(0, 0, 0, 0.4)
+    ctx.paint()
+    return surface
+
+
+class RedrawScheduler:
+    """Redraw a widget at most once per frame-clock tick.
+
+    Motion events can arrive several times per frame; each ``schedule()``
+    call before the next tick is folded into a single ``queue_draw()``.
+    """
+
+    def __init__(self, widget):
+        self._widget = widget
+        self._tick_id: int | None = None
+
+    def schedule(self) -> None:
+        if self._tick_id is None:
+            self._tick_id = self._widget.add_tick_callback(self._on_tick)
+
+    def _on_tick(self, widget, frame_clock):
+        self._tick_id = None
+        widget.queue_draw()
+        return False  # One-shot; re-armed by the next schedule()
@@ -11,6 +11,8 @@ gi.require_version("Adw", "1")
 
 from gi.repository import Adw, Gdk, Gtk
 
+_KEY_ESCAPE = Gdk.KEY_Escape
+
 
 class RecordingIndicator(Gtk.Window):
     """Small floating window that shows recording status and duration."""
@@ -50,7 +52,8 @@ class RecordingIndicator(Gtk.Window):
         box.append(rec_label)
 
         # Duration
-        self._duration_label = Gtk.Label(label="00:00")
+        self._duration_text = "00:00"
+        self._duration_label = Gtk.Label(label=self._duration_text)
         self._duration_label.add_css_class("recording-duration")
         box.append(self._duration_label)
 
@@ -68,15 +71,18 @@ class RecordingIndicator(Gtk.Window):
         self.add_controller(key)
 
     def update_duration(self, seconds: float):
-        mins = int(seconds) // 60
-        secs = int(seconds) % 60
-        self._duration_label.set_text(f"{mins:02d}:{secs:02d}")
+        minutes, secs = divmod(int(seconds), 60)
+        text = f"{minutes:02d}:{secs:02d}"
+        # Skip the relayout when the visible text hasn't changed
+        if text != self._duration_text:
+            self._duration_text = text
+            self._duration_label.set_text(text)
 
     def _on_stop_clicked(self, btn):
         self._on_stop()
 
     def _on_key_pressed(self, controller, keyval, keycode, state):
-        if keyval == Gdk.KEY_Escape:
+        if keyval == _KEY_ESCAPE:
             self._on_stop()
             return True
         return False
@@ -11,6 +11,27 @@ gi.require_version("Gtk", "4.0")
 from gi.repository import Gdk, GdkPixbuf, GLib, Gtk
 import cairo
 
+from snipr.ui.overlay_surfaces import (
+    RedrawScheduler, make_dim_surface, reusable_surface,
+)
+
+_KEY_ESCAPE = Gdk.KEY_Escape
+
+_INSTRUCTION_TEXT = "Click and drag to select a region. Press Escape to cancel."
+
+# Size-label widths remembered before the oldest is evicted
+_LABEL_CACHE_SIZE = 64
+
+
+def _make_unit_rect_path() -> cairo.Path:
+    ctx = cairo.Context(cairo.ImageSurface(cairo.FORMAT_A8, 1, 1))
+    ctx.rectangle(0, 0, 1, 1)
+    return ctx.copy_path()
+
+
+# Selection border outline, scaled into place each frame
+_UNIT_RECT_PATH = _make_unit_rect_path()
+
 
 class RectangleSelectionOverlay(Gtk.Window):
     """Fullscreen overlay for selecting a rectangular screen region.
@@ -21,8 +42,8 @@ class RectangleSelectionOverlay(Gtk.Window):
 
     def __init__(
         self,
-        capture_service,
-        on_selected: Callable[[int, int, int, int], None],
+        desktop_pixbuf: GdkPixbuf.Pixbuf,
+        on_selected: Callable[[int, int, int, int, GdkPixbuf.Pixbuf], None],
         on_cancelled: Callable[[], None],
     ):
         super().__init__(
@@ -30,7 +51,8 @@ class RectangleSelectionOverlay(Gtk.Window):
             decorated=False,
             modal=True,
         )
-        self._capture_service = capture_service
+        # Captured by the caller before the overlay is shown
+        self._desktop_pixbuf = desktop_pixbuf
         self._on_selected = on_selected
         self._on_cancelled = on_cancelled
 
@@ -39,9 +61,12 @@ class RectangleSelectionOverlay(Gtk.Window):
         self._start_y = 0.0
         self._current_x = 0.0
         self._current_y = 0.0
+        # Integer selection rect last queued for drawing
+        self._last_draw_rect: tuple[int, int, int, int] | None = None
+        self._instruction_width: float | None = None
+        # Size label string -> measured width; consecutive frames mostly repeat
+        self._label_widths: dict[str, float] = {}
 
-        # Capture desktop BEFORE showing overlay
-        self._desktop_pixbuf = self._capture_service.capture_fullscreen()
         self._screen_w = self._desktop_pixbuf.get_width()
         self._screen_h = self._desktop_pixbuf.get_height()
 
@@ -52,6 +77,7 @@ class RectangleSelectionOverlay(Gtk.Window):
         self._drawing_area = Gtk.DrawingArea()
         self._drawing_area.set_draw_func(self._on_draw)
         self.set_child(self._drawing_area)
+        self._redraw = RedrawScheduler(self._drawing_area)
 
         # Input controllers
         click = Gtk.GestureClick()
@@ -70,62 +96,69 @@ class RectangleSelectionOverlay(Gtk.Window):
 
         # Convert pixbuf to cairo surface for fast drawing
         self._desktop_surface = self._pixbuf_to_surface(self._desktop_pixbuf)
+        self.connect("close-request", self._on_close_request)
+        self._dim_surface = make_dim_surface(self._desktop_surface)
 
     def _pixbuf_to_surface(self, pixbuf: GdkPixbuf.Pixbuf) -> cairo.ImageSurface:
         """Convert a GdkPixbuf to a cairo ImageSurface."""
         w = pixbuf.get_width()
         h = pixbuf.get_height()
-        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, w, h)
+        surface = reusable_surface("desktop", w, h)
         ctx = cairo.Context(surface)
+        ctx.set_operator(cairo.OPERATOR_SOURCE)
         Gdk.cairo_set_source_pixbuf(ctx, pixbuf, 0, 0)
         ctx.paint()
         return surface
 
     def _on_draw(self, area, ctx: cairo.Context, width: int, height: int):
-        # Draw desktop screenshot
-        ctx.set_source_surface(self._desktop_surface, 0, 0)
+        # Dimmed desktop
+        ctx.set_source_surface(self._dim_surface, 0, 0)
         ctx.paint()
 
-        # Draw dim overlay
-        ctx.set_source_rgba(0, 0, 0, 0.4)
-
         if self._is_selecting:
-            # Punch a hole for the selection
             sx, sy, sw, sh = self._get_selection_rect()
             if sw > 0 and sh > 0:
-                ctx.rectangle(0, 0, width, height)
+                # Reveal the undimmed desktop inside the selection
+                ctx.save()
                 ctx.rectangle(sx, sy, sw, sh)
-                ctx.set_fill_rule(cairo.FILL_RULE_EVEN_ODD)
-                ctx.fill()
+                ctx.clip()
+                ctx.set_source_surface(self._desktop_surface, 0, 0)
+                ctx.paint()
+                ctx.restore()
 
                 # Draw selection border
                 ctx.set_source_rgba(0.2, 0.5, 1.0, 0.9)
                 ctx.set_line_width(2)
-                ctx.rectangle(sx, sy, sw, sh)
+                ctx.save()
+                ctx.translate(sx, sy)
+                ctx.scale(sw, sh)
+                ctx.append_path(_UNIT_RECT_PATH)
+                ctx.restore()  # Stroke with an unscaled 2px pen
                 ctx.stroke()
 
                 # Draw size label
                 label = f"{int(sw)} x {int(sh)}"
                 ctx.set_source_rgba(1, 1, 1, 0.9)
                 ctx.set_font_size(14)
-                extents = ctx.text_extents(label)
-                lx = sx + (sw - extents.width) / 2
+                label_w = self._label_widths.get(label)
+                if label_w is None:
+                    if len(self._label_widths) >= _LABEL_CACHE_SIZE:
+                        del self._label_widths[next(iter(self._label_widths))]
+                    label_w = self._label_widths[label] = ctx.text_extents(label).width
+                lx = sx + (sw - label_w) / 2
                 ly = sy - 8 if sy > 25 else sy + sh + 20
                 ctx.move_to(lx, ly)
                 ctx.show_text(label)
                 return
 
-        # No selection - full dim
-        ctx.rectangle(0, 0, width, height)
-        ctx.fill()
-
         # Draw instruction text
         ctx.set_source_rgba(1, 1, 1, 0.8)
         ctx.set_font_size(18)
-        text = "Click and drag to select a region. Press Escape to cancel."
-        extents = ctx.text_extents(text)
-        ctx.move_to((width - extents.width) / 2, height / 2)
-        ctx.show_text(text)
+        if self._instruction_width is None:
+            # The text never changes, so measure it only on the first frame
+            self._instruction_width = ctx.text_extents(_INSTRUCTION_TEXT).width
+        ctx.move_to((width - self._instruction_width) / 2, height / 2)
+        ctx.show_text(_INSTRUCTION_TEXT)
 
     def _on_press(self, gesture, n_press, x, y):
         self._is_selecting = True
@@ -133,12 +166,18 @@ class RectangleSelectionOverlay(Gtk.Window):
         self._start_y = y
         self._current_x = x
         self._current_y = y
+        self._last_draw_rect = None
 
     def _on_motion(self, controller, x, y):
         if self._is_selecting:
             self._current_x = x
             self._current_y = y
-            self._drawing_area.queue_draw()
+            # GTK 4 has no queue_draw_area(), so any redraw repaints the whole
+            # area; skip it when the selection hasn't moved by a full pixel.
+            rect = tuple(int(v) for v in self._get_selection_rect())
+            if rect != self._last_draw_rect:
+                self._last_draw_rect = rect
+                self._redraw.schedule()
 
     def _on_release(self, gesture, n_press, x, y):
         if not self._is_selecting:
@@ -152,11 +191,20 @@ class RectangleSelectionOverlay(Gtk.Window):
             self._drawing_area.queue_draw()
             return
 
+        desktop = self._desktop_pixbuf
         self.close()
-        self._on_selected(int(sx), int(sy), int(sw), int(sh))
+        # Hand back the frozen desktop so screenshots can be cropped from it
+        # instead of grabbing the screen a second time.
+        self._on_selected(int(sx), int(sy), int(sw), int(sh), desktop)
+
+    def _on_close_request(self, _window):
+        # The pixbuf is only kept for the crop handed back on selection;
+        # don't let a lingering overlay object pin a full-screen frame.
+        self._desktop_pixbuf = None
+        return False
 
     def _on_key_pressed(self, controller, keyval, keycode, state):
-        if keyval == Gdk.KEY_Escape:
+        if keyval == _KEY_ESCAPE:
             self.close()
             self._on_cancelled()
             return True
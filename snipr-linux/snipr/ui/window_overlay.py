@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import math
+import sys
 from typing import Callable
 
 import gi
@@ -11,7 +13,13 @@ gi.require_version("Gtk", "4.0")
 from gi.repository import Gdk, GdkPixbuf, Gtk
 import cairo
 
-from snipr.services.window_enum import WindowEnumerationService, WindowInfo
+from snipr.services.window_enum import WindowInfo
+from snipr.ui.overlay_surfaces import (
+    RedrawScheduler, make_dim_surface, reusable_surface,
+)
+
+# Side of the square hit-test grid cells, in pixels
+_GRID_CELL = 128
 
 
 class WindowSelectionOverlay(Gtk.Window):
@@ -21,9 +29,13 @@ class WindowSelectionOverlay(Gtk.Window):
     moves over different windows.
     """
 
+    # Scale factor -> rendered instruction prompt
+    _prompts: dict[int, tuple[cairo.ImageSurface, float, float]] = {}
+
     def __init__(
         self,
-        capture_service,
+        desktop_pixbuf: GdkPixbuf.Pixbuf,
+        windows: list[WindowInfo],
         on_selected: Callable[[WindowInfo], None],
         on_cancelled: Callable[[], None],
     ):
@@ -32,24 +44,45 @@ class WindowSelectionOverlay(Gtk.Window):
             decorated=False,
             modal=True,
         )
-        self._capture_service = capture_service
         self._on_selected = on_selected
         self._on_cancelled = on_cancelled
 
-        self._window_enum = WindowEnumerationService()
-        self._windows = self._window_enum.get_windows()
         self._hovered_window: WindowInfo | None = None
+        # _bounds entry of the hovered window, for the motion fast path
+        self._hovered_entry: tuple | None = None
+        self._last_motion = (-1.0, -1.0)
+        # window_id -> no other window stacked above overlaps it
+        self._unobscured: dict[int, bool] = {}
+        # window_id -> (title surface, ink width, ascent), rendered on first hover
+        # at _title_scale device pixels per unit
+        self._title_cache: dict[int, tuple[cairo.ImageSurface, float, float]] = {}
+        self._title_scale = 1
 
-        # Capture desktop
-        self._desktop_pixbuf = self._capture_service.capture_fullscreen()
+        screen_w = desktop_pixbuf.get_width()
+        screen_h = desktop_pixbuf.get_height()
+        self._screen_size = (screen_w, screen_h)
+        # Windows wholly off-screen (other workspaces, parked off the edge)
+        # can never be under the pointer
+        self._windows = [
+            w for w in windows
+            if w.x < screen_w and w.y < screen_h and w.x + w.width >= 0 and w.y + w.height >= 0
+        ]
+        self._build_grid(screen_w, screen_h)
+        # Label text per window, clipped once up front
+        self._display_titles = {
+            w.window_id: w.title[:60] + "..." if len(w.title) > 60 else w.title
+            for w in self._windows
+        }
 
         self.fullscreen()
         self.set_cursor(Gdk.Cursor.new_from_name("crosshair", None))
+        self.connect("realize", self._on_realize)
 
         # Drawing area
         self._drawing_area = Gtk.DrawingArea()
         self._drawing_area.set_draw_func(self._on_draw)
         self.set_child(self._drawing_area)
+        self._redraw = RedrawScheduler(self._drawing_area)
 
         # Input controllers
         click = Gtk.GestureClick()
@@ -65,76 +98,260 @@ class WindowSelectionOverlay(Gtk.Window):
         key.connect("key-pressed", self._on_key_pressed)
         self.add_controller(key)
 
-        self._desktop_surface = self._pixbuf_to_surface(self._desktop_pixbuf)
+        # Only the converted surfaces are drawn from; the pixbuf isn't kept
+        # on self, so its pixels are freed as soon as __init__ returns.
+        self._desktop_surface = self._pixbuf_to_surface(desktop_pixbuf)
+        # Only the hovered window shows the desktop at full detail, so a
+        # half-resolution dim layer is enough on very large desktops
+        self._dim_surface = make_dim_surface(self._desktop_surface, downscale=True)
+
+    def _on_realize(self, window):
+        """Tell the compositor the overlay fully covers what's beneath it.
+
+        Every frame paints the opaque desktop edge to edge, so the compositor
+        can skip blending the windows below (``_NET_WM_OPAQUE_REGION`` on X11,
+        ``wl_surface.set_opaque_region`` on Wayland). GTK 4.16+ deprecates the
+        call and derives the region itself.
+        """
+        surface = self.get_surface()
+        if surface is None or not hasattr(surface, "set_opaque_region"):
+            return
+        region = cairo.Region(cairo.RectangleInt(0, 0, *self._screen_size))
+        surface.set_opaque_region(region)
 
     def _pixbuf_to_surface(self, pixbuf: GdkPixbuf.Pixbuf) -> cairo.ImageSurface:
         w = pixbuf.get_width()
         h = pixbuf.get_height()
-        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, w, h)
-        ctx = cairo.Context(surface)
-        Gdk.cairo_set_source_pixbuf(ctx, pixbuf, 0, 0)
-        ctx.paint()
+        surface = reusable_surface("desktop", w, h)
+        if sys.byteorder != "little":
+            ctx = cairo.Context(surface)
+            ctx.set_operator(cairo.OPERATOR_SOURCE)
+            Gdk.cairo_set_source_pixbuf(ctx, pixbuf, 0, 0)
+            ctx.paint()
+            return surface
+
+        # Write the pixels straight into the surface's BGRA memory, skipping
+        # cairo's pixbuf conversion and the paint pass after it.
+        stride = pixbuf.get_rowstride()
+        pixels = pixbuf.read_pixel_bytes().get_data()
+        surface.flush()
+        data = surface.get_data()
+        # Deferred so opening the main window doesn't load PIL
+        from PIL import Image
+
+        if pixbuf.get_has_alpha():
+            # PIL premultiplies and repacks in C
+            image = Image.frombuffer("RGBA", (w, h), pixels, "raw", "RGBA", stride, 1)
+            data[:] = image.convert("RGBa").tobytes("raw", "BGRa")
+        else:
+            if stride == w * 3:
+                # Tightly packed captures: strided slice copies
+                data[0::4] = pixels[2::3]
+                data[1::4] = pixels[1::3]
+                data[2::4] = pixels[0::3]
+            else:
+                image = Image.frombuffer("RGB", (w, h), pixels, "raw", "RGB", stride, 1)
+                data[:] = image.tobytes("raw", "BGRX")
+            data[3::4] = b"\xff" * (w * h)
+        surface.mark_dirty()
         return surface
 
     def _on_draw(self, area, ctx: cairo.Context, width: int, height: int):
-        # Draw desktop
-        ctx.set_source_surface(self._desktop_surface, 0, 0)
-        ctx.paint()
+        # GTK 4 has no partial invalidation (queue_draw_area) and a drawing
+        # area always repaints in full, so make that repaint a plain copy:
+        # the backdrop layers are opaque, and OPERATOR_SOURCE lets pixman
+        # skip per-pixel blending.
+        ctx.set_operator(cairo.OPERATOR_SOURCE)
 
-        # Dim overlay
-        ctx.set_source_rgba(0, 0, 0, 0.4)
+        # Dimmed desktop
+        ctx.set_source_surface(self._dim_surface, 0, 0)
+        ctx.get_source().set_filter(cairo.FILTER_BILINEAR)
+        ctx.paint()
 
         if self._hovered_window:
             win = self._hovered_window
-            # Punch hole for hovered window
-            ctx.rectangle(0, 0, width, height)
+            # Reveal the undimmed desktop inside the hovered window
+            ctx.set_source_surface(self._desktop_surface, 0, 0)
             ctx.rectangle(win.x, win.y, win.width, win.height)
-            ctx.set_fill_rule(cairo.FILL_RULE_EVEN_ODD)
             ctx.fill()
+            ctx.set_operator(cairo.OPERATOR_OVER)
 
-            # Highlight border
+            # Highlight border: a 3px band centred on the window edge, as
+            # four pixel-aligned, non-overlapping rectangles so cairo fills
+            # them as boxes instead of running the stroker. Corners must not
+            # be covered twice or the translucent colour would darken there.
+            x0, y0 = win.x - 1, win.y - 1
+            x1, y1 = win.x + win.width + 2, win.y + win.height + 2
             ctx.set_source_rgba(0.2, 0.5, 1.0, 0.9)
-            ctx.set_line_width(3)
-            ctx.rectangle(win.x, win.y, win.width, win.height)
-            ctx.stroke()
+            ctx.rectangle(x0, y0, x1 - x0, 3)
+            ctx.rectangle(x0, y1 - 3, x1 - x0, 3)
+            ctx.rectangle(x0, y0 + 3, 3, y1 - y0 - 6)
+            ctx.rectangle(x1 - 3, y0 + 3, 3, y1 - y0 - 6)
+            ctx.fill()
 
             # Window title label
-            title = win.title[:60] + "..." if len(win.title) > 60 else win.title
-            ctx.set_source_rgba(1, 1, 1, 0.9)
-            ctx.set_font_size(14)
-            extents = ctx.text_extents(title)
-            lx = win.x + (win.width - extents.width) / 2
+            label, text_w, ascent = self._title_label(win)
+            lx = win.x + (win.width - text_w) / 2
             ly = win.y - 8 if win.y > 25 else win.y + win.height + 20
-            lx = max(4, min(lx, width - extents.width - 4))
-            ctx.move_to(lx, ly)
-            ctx.show_text(title)
+            lx = max(4, min(lx, width - text_w - 4))
+            ctx.set_source_surface(label, round(lx) - 1, round(ly - ascent) - 1)
+            ctx.paint()
         else:
-            ctx.rectangle(0, 0, width, height)
-            ctx.fill()
+            ctx.set_operator(cairo.OPERATOR_OVER)
+            label, text_w, ascent = self._prompt_label(self.get_scale_factor())
+            ctx.set_source_surface(label, round((width - text_w) / 2) - 1,
+                                   round(height / 2 - ascent) - 1)
+            ctx.paint()
+
+    def _title_label(self, win: WindowInfo) -> tuple[cairo.ImageSurface, float, float]:
+        """Return ``win``'s title rasterized once, with its ink width and ascent."""
+        scale = self.get_scale_factor()
+        if scale != self._title_scale:
+            # Moved to a monitor with a different scale; re-rasterize
+            self._title_cache.clear()
+            self._title_scale = scale
+        cached = self._title_cache.get(win.window_id)
+        if cached is None:
+            cached = self._title_cache[win.window_id] = self._render_label(
+                self._display_titles[win.window_id], 14, 0.9, scale,
+            )
+        return cached
 
-            ctx.set_source_rgba(1, 1, 1, 0.8)
-            ctx.set_font_size(18)
-            text = "Click on a window to select it. Press Escape to cancel."
-            extents = ctx.text_extents(text)
-            ctx.move_to((width - extents.width) / 2, height / 2)
-            ctx.show_text(text)
+    @classmethod
+    def _prompt_label(cls, scale: int) -> tuple[cairo.ImageSurface, float, float]:
+        """The static instruction text, rasterized once per scale factor."""
+        prompt = cls._prompts.get(scale)
+        if prompt is None:
+            prompt = cls._prompts[scale] = cls._render_label(
+                "Click on a window to select it. Press Escape to cancel.", 18, 0.8, scale,
+            )
+        return prompt
+
+    @staticmethod
+    def _render_label(text: str, size: float, alpha: float,
+                      scale: int = 1) -> tuple[cairo.ImageSurface, float, float]:
+        """Rasterize white ``text`` into a surface with a 1px margin.
+
+        The surface holds ``scale`` device pixels per unit, with a matching
+        device scale, so the label stays sharp on HiDPI outputs. Returns the
+        surface, the text's ink width and its ascent (both in units); the
+        baseline sits at ``1 + ascent`` from the surface's top edge.
+        """
+        scratch = cairo.Context(cairo.ImageSurface(cairo.FORMAT_A8, 1, 1))
+        scratch.set_font_size(size)
+        extents = scratch.text_extents(text)
+        ascent, descent = scratch.font_extents()[:2]
+        right = max(extents.x_advance, extents.x_bearing + extents.width)
+        surface = cairo.ImageSurface(
+            cairo.FORMAT_ARGB32,
+            (math.ceil(right) + 2) * scale, (math.ceil(ascent + descent) + 2) * scale,
+        )
+        surface.set_device_scale(scale, scale)
+        ctx = cairo.Context(surface)
+        ctx.set_source_rgba(1, 1, 1, alpha)
+        ctx.set_font_size(size)
+        ctx.move_to(1, 1 + ascent)
+        ctx.show_text(text)
+        return surface, extents.width, ascent
+
+    def _build_grid(self, width: int, height: int) -> None:
+        """Bucket windows into fixed cells so a hit test only scans one cell.
+
+        Each cell lists the windows overlapping it topmost first, so the
+        first match is the hit. A list stops at the first window covering
+        the whole cell, since nothing beneath it there can be under the
+        pointer; large maximized windows would otherwise leave every cell
+        holding the full stack. Entries are precomputed
+        ``(x0, y0, x1, y1, window)`` tuples, so the scan compares plain ints
+        instead of loading and adding attributes.
+        """
+        self._bounds = [
+            (win.x, win.y, win.x + win.width, win.y + win.height, win)
+            for win in self._windows
+        ]
+        self._grid_cols = -(-width // _GRID_CELL)
+        self._grid_rows = -(-height // _GRID_CELL)
+        self._grid: list[list[tuple]] = [[] for _ in range(self._grid_cols * self._grid_rows)]
+        closed = [False] * len(self._grid)
+        for entry in reversed(self._bounds):
+            x0, y0, x1, y1, _ = entry
+            c0 = max(0, x0 // _GRID_CELL)
+            c1 = min(self._grid_cols - 1, x1 // _GRID_CELL)
+            r0 = max(0, y0 // _GRID_CELL)
+            r1 = min(self._grid_rows - 1, y1 // _GRID_CELL)
+            for row in range(r0, r1 + 1):
+                top = row * _GRID_CELL
+                covers_rows = y0 <= top and y1 >= top + _GRID_CELL
+                base = row * self._grid_cols
+                for col in range(c0, c1 + 1):
+                    cell = base + col
+                    if closed[cell]:
+                        continue
+                    self._grid[cell].append(entry)
+                    left = col * _GRID_CELL
+                    if covers_rows and x0 <= left and x1 >= left + _GRID_CELL:
+                        closed[cell] = True
+
+    def _entry_at(self, x: float, y: float) -> tuple | None:
+        """Return the topmost ``(x0, y0, x1, y1, window)`` entry under a point."""
+        col = int(x) // _GRID_CELL
+        row = int(y) // _GRID_CELL
+        if 0 <= col < self._grid_cols and 0 <= row < self._grid_rows:
+            candidates = self._grid[row * self._grid_cols + col]
+        else:
+            candidates = reversed(self._bounds)
+        for entry in candidates:
+            x0, y0, x1, y1, _ = entry
+            if x0 <= x <= x1 and y0 <= y <= y1:
+                return entry
+        return None
+
+    def _window_at(self, x: float, y: float) -> WindowInfo | None:
+        entry = self._entry_at(x, y)
+        return entry[4] if entry else None
 
     def _on_motion(self, controller, x, y):
-        # Find window under cursor
+        # Skip tiny moves; the click handler hit-tests its own position, so
+        # a slightly stale hover only affects the highlight.
+        last_x, last_y = self._last_motion
+        if abs(x - last_x) + abs(y - last_y) < 2:
+            return
+        self._last_motion = (x, y)
+
         prev = self._hovered_window
-        self._hovered_window = None
-        for win in reversed(self._windows):
-            if (win.x <= x <= win.x + win.width and
-                    win.y <= y <= win.y + win.height):
-                self._hovered_window = win
-                break
-        if self._hovered_window != prev:
-            self._drawing_area.queue_draw()
+        # Fast path: the pointer usually stays over the same window, and if
+        # nothing is stacked over it, being inside its bounds settles it.
+        if prev is not None:
+            x0, y0, x1, y1, _ = self._hovered_entry
+            if x0 <= x <= x1 and y0 <= y <= y1 and self._is_unobscured(prev):
+                return
+
+        # Find window under cursor
+        self._hovered_entry = self._entry_at(x, y)
+        self._hovered_window = self._hovered_entry[4] if self._hovered_entry else None
+        if self._hovered_window is not prev:
+            self._redraw.schedule()
+
+    def _is_unobscured(self, win: WindowInfo) -> bool:
+        """Whether no window stacked above ``win`` overlaps it (memoized)."""
+        clear = self._unobscured.get(win.window_id)
+        if clear is None:
+            above = False
+            clear = True
+            wx0, wy0, wx1, wy1 = win.x, win.y, win.x + win.width, win.y + win.height
+            for x0, y0, x1, y1, other in self._bounds:
+                if above and x0 <= wx1 and wx0 <= x1 and y0 <= wy1 and wy0 <= y1:
+                    clear = False
+                    break
+                above = above or other is win
+            self._unobscured[win.window_id] = clear
+        return clear
 
     def _on_click(self, gesture, n_press, x, y):
-        if self._hovered_window:
+        win = self._window_at(x, y)
+        if win:
             self.close()
-            self._on_selected(self._hovered_window)
+            self._on_selected(win)
 
     def _on_key_pressed(self, controller, keyval, keycode, state):
         if keyval == Gdk.KEY_Escape: